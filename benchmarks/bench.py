@@ -0,0 +1,198 @@
+"""
+Benchmarks for the emulators, fitness evaluation and evolution
+
+Run with `python -O -m benchmarks.bench` from the top of the repository, or
+`make bench`. Every benchmark reports a rate, so higher is better, and is
+compared to the stored baseline. Baselines only mean anything on the machine
+they were saved on, so save new ones with `--save` before comparing changes.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+from benchmarks.corpus import INPUT, PROGRAMS
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.compiler import CompiledEmulator
+from gp.evolve import Evolve
+from gp.gene import CaseRun, Gene
+from gp.generate import generate
+from gp.selection import RouletteSelector, TournamentSelector
+from gp.trainer import Hello, Reverse
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# work done by a single run of a benchmark, and the seconds it took
+Run = Tuple[int, float]
+
+
+class Benchmark(NamedTuple):
+    """A piece of work to time, that reports how much it did"""
+    name: str
+    unit: str
+    run: Callable[[], Run]
+
+
+def measure(benchmark: Benchmark,
+            repeat: int = 5,
+            min_time: float = 0.2) -> float:
+    """
+    Time a benchmark, running it over and over for at least `min_time`
+    seconds per repeat
+
+    :param benchmark: Benchmark to time
+    :param repeat: Number of times to repeat the timing
+    :param min_time: Least number of seconds every repeat takes
+    :return: The best rate over every repeat, in work done per second
+    """
+    best = 0.0
+    for _ in range(repeat):
+        done, seconds = 0, 0.0
+        while seconds < min_time:
+            work, elapsed = benchmark.run()
+            done += work
+            seconds += elapsed
+        best = max(best, done / seconds)
+    return best
+
+
+def emulator_benchmarks() -> Iterator[Benchmark]:
+    """Cycles per second of `run` for every engine on every program"""
+    for engine in (BrainfuckEmulator, CompiledEmulator):
+        for name, code in PROGRAMS.items():
+            def run(engine=engine, code=code) -> Run:
+                emulator = engine(code, INPUT, 100_000)
+                start = time.perf_counter()
+                emulator.run()
+                return emulator.cycles, time.perf_counter() - start
+
+            yield Benchmark('emulator.{}.{}'.format(engine.__name__, name),
+                            'cycles/s', run)
+
+
+def fitness_benchmarks() -> Iterator[Benchmark]:
+    """
+    Evaluations per second of `Gene.fitness`, with the cache off, and again
+    without working out simple genes before running them to show what that
+    saves, see `gp.analysis`
+    """
+    random.seed(0)
+    codes = generate(100, 350, 75)
+    for trainer_type in (Hello, Reverse):
+        for prepass in (True, False):
+            def run(trainer_type=trainer_type, prepass=prepass) -> Run:
+                trainer = trainer_type()
+                genes = [Gene(trainer, code) for code in codes]
+                cache, Gene.cache = Gene.cache, None
+                CaseRun.prepass = prepass
+                try:
+                    start = time.perf_counter()
+                    for g in genes:
+                        g.fitness()
+                    return len(genes), time.perf_counter() - start
+                finally:
+                    Gene.cache = cache
+                    CaseRun.prepass = True
+
+            name = 'fitness.{}'.format(trainer_type.__name__)
+            if not prepass:
+                name += '.no_prepass'
+            yield Benchmark(name, 'evaluations/s', run)
+
+
+def offspring_benchmarks(generations: int = 5) -> Iterator[Benchmark]:
+    """Generations per second of `Evolve.offspring`, from a seeded start"""
+    for selector_type in (RouletteSelector, TournamentSelector):
+        def run(selector_type=selector_type) -> Run:
+            random.seed(0)
+            Gene.cache.clear()
+            evolve = Evolve(Hello(), genes_per_gen=16,
+                            selector=selector_type())
+            generation = evolve.generation_zero()
+            start = time.perf_counter()
+            for _ in range(generations):
+                generation = evolve.offspring(generation)
+            return generations, time.perf_counter() - start
+
+        yield Benchmark('offspring.{}'.format(selector_type.__name__),
+                        'generations/s', run)
+
+
+def benchmarks() -> List[Benchmark]:
+    """Every benchmark in the suite"""
+    return [*emulator_benchmarks(),
+            *fitness_benchmarks(),
+            *offspring_benchmarks()]
+
+
+def regressions(rates: Dict[str, float],
+                baseline: Dict[str, float],
+                threshold: float) -> List[str]:
+    """
+    Benchmarks that got slower than their baseline by more than a threshold
+
+    :param rates: Rate of every benchmark run
+    :param baseline: Stored rate of every benchmark
+    :param threshold: Fraction of the baseline a rate may drop by
+    :return: Names of the benchmarks that regressed
+    """
+    return [name for name, rate in rates.items()
+            if name in baseline and rate < baseline[name] * (1 - threshold)]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description='Benchmark the emulators, fitness evaluation and '
+                    'evolution against stored baselines')
+    parser.add_argument('-k', '--select', default='',
+                        help='only run benchmarks whose name contains this')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='timings per benchmark, the best is kept '
+                             '(default: %(default)s)')
+    parser.add_argument('-t', '--threshold', type=float, default=0.2,
+                        help='fraction a rate may drop below its baseline '
+                             'before it counts as a regression '
+                             '(default: %(default)s)')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='file the baselines are stored in '
+                             '(default: %(default)s)')
+    parser.add_argument('--save', action='store_true',
+                        help='store the rates as the new baselines')
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+
+    rates = {}
+    for benchmark in benchmarks():
+        if args.select not in benchmark.name:
+            continue
+        rate = rates[benchmark.name] = measure(benchmark, args.repeat)
+        line = '{:<44} {:>14,.1f} {}'.format(benchmark.name, rate,
+                                             benchmark.unit)
+        if benchmark.name in baseline:
+            line += ' ({:+.1%})'.format(rate / baseline[benchmark.name] - 1)
+        print(line, flush=True)
+
+    if args.save:
+        baseline.update(rates)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return 0
+
+    slower = regressions(rates, baseline, args.threshold)
+    for name in slower:
+        print('Regression: {} is more than {:.0%} below its baseline'
+              .format(name, args.threshold))
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
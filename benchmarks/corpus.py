@@ -0,0 +1,30 @@
+"""
+Fixed Brainfuck programs to benchmark the emulators on, each stressing a
+different part of them
+"""
+
+PROGRAMS = {
+    # the classic, nested multiply loops and a scan
+    'hello': '++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]'
+             '>>.>---.+++++++..+++.>>.<-.<.+++.------.--------.>>+.>++.',
+
+    # tight loops that count down a few cells, too busy to be fused
+    'tight_loops': '++++++++[>++++++++[>++++++++[>+>-<<-]<-]<-]'
+                   '>>>[-<+>>+<]<[<+>>>+<<-]',
+
+    # a single loop writing out every character it makes, until out of
+    # cycles
+    'output_spam': '+[.+]',
+
+    # loops nested ten deep, each counting down its own cell
+    'deep_nesting': '+++' + '[>+++' * 9 + '[-]' + '<-]' * 9,
+
+    # the data pointer walking left, growing the tape as it goes
+    'left_growth': '+[<+]',
+
+    # reading input until it runs out, and writing it back reversed
+    'reverse_input': '>,[>,]<[.<]',
+}
+
+# input given to every program
+INPUT = 'the quick brown fox jumps over the lazy dog'
@@ -0,0 +1,110 @@
+import argparse
+import contextlib
+import logging
+import sys
+from typing import List
+
+from gp.evolve import Evolve
+from gp.islands import Islands
+from gp.metrics import JsonLinesSink
+from gp.pipeline import PipelineEvolve
+from gp.profiling import Profiler
+from gp.racing import RacingEvaluator
+from gp.steady_state import SteadyStateEvolve
+from gp.trainer import AddDigits, Hello, Reverse
+
+TRAINERS = {
+    'hello': Hello,
+    'reverse': Reverse,
+    'add': AddDigits,
+}
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        description='Evolve a Brainfuck program that writes `Hello world!`, '
+                    'or solves another problem')
+    parser.add_argument('-t', '--trainer', choices=sorted(TRAINERS),
+                        default='hello',
+                        help='problem to solve (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='processes to evaluate genes on, 0 for one per '
+                             'core (default: %(default)s)')
+    parser.add_argument('--shared-memory', action='store_true',
+                        help='send genes to worker processes, and get their '
+                             'results back, through shared memory '
+                             '(Python 3.8+)')
+    parser.add_argument('-i', '--islands', type=int, default=1,
+                        help='populations to evolve in separate processes, '
+                             '0 for one per core (default: %(default)s)')
+    parser.add_argument('-p', '--pipeline', action='store_true',
+                        help='breed children while others are evaluated')
+    parser.add_argument('-s', '--steady-state', action='store_true',
+                        help='replace the worst gene with every better child, '
+                             'rather than a generation at a time')
+    parser.add_argument('-r', '--race', action='store_true',
+                        help='give slow genes fewer cycles than promising '
+                             'ones, in this process')
+    parser.add_argument('-d', '--dedup', action='store_true',
+                        help='keep genes with the same output as one already '
+                             'in the population out of it')
+    parser.add_argument('-m', '--metrics', metavar='FILE',
+                        help='append a JSON record of every generation to '
+                             'FILE, not with islands')
+    parser.add_argument('--profile', metavar='FILE', nargs='?',
+                        const='gp.prof',
+                        help='count the commands genes run and time every '
+                             'phase and function, then print a summary and '
+                             'write cProfile stats to FILE (default: '
+                             '%(const)s), not with islands or workers')
+    args = parser.parse_args(argv)
+    if args.profile and (args.islands != 1 or args.workers != 1):
+        parser.error('--profile only sees this process, so it needs '
+                     '--islands 1 and --workers 1')
+
+    if __debug__:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.INFO)
+    log = logging.getLogger(__name__)
+    log.info('Starting...')
+
+    try:
+        if args.islands == 1:
+            if args.steady_state:
+                evolve_type = SteadyStateEvolve
+            elif args.pipeline:
+                evolve_type = PipelineEvolve
+            else:
+                evolve_type = Evolve
+            evaluator = None
+            if args.race:
+                evaluator = RacingEvaluator()
+            elif args.shared_memory and args.workers != 1:
+                # `multiprocessing.shared_memory` is new in Python 3.8
+                from gp.transport import SharedMemoryEvaluator
+                evaluator = SharedMemoryEvaluator(args.workers or None)
+            evolve = evolve_type(TRAINERS[args.trainer](),
+                                 genes_per_gen=16,
+                                 workers=args.workers,
+                                 evaluator=evaluator,
+                                 dedup=args.dedup)
+            if args.metrics:
+                evolve.add_sink(JsonLinesSink(args.metrics, details=True))
+        else:
+            evolve = Islands(TRAINERS[args.trainer](),
+                             islands=args.islands,
+                             genes_per_gen=16)
+
+        profiler = contextlib.nullcontext()
+        if args.profile:
+            profiler = Profiler(args.profile)
+            evolve.add_sink(profiler)
+        with profiler:
+            print(evolve.generate_solution())
+    except KeyboardInterrupt:
+        log.critical('Keyboard interrupt received')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,143 @@
+import collections
+from array import array
+from typing import Dict, List, NamedTuple, Optional
+
+from gp.brainfuck_machine import BrainfuckEmulator, Snapshot
+from gp.compiler import _loop_body
+
+# how a program ends, as far as can be told without running it
+UNKNOWN = 0  # it has to be run to tell
+SILENT = 1  # no `.` can ever be reached, so it never produces output
+TRIVIAL = 2  # it halts, and every loop it runs is simple to work out
+HANGS = 3  # it gets stuck in a loop that never ends and has no output
+
+
+class Analysis(NamedTuple):
+    """What is known about a program before it is run"""
+    kind: int
+    output: Optional[str] = None  # the complete output, unless `UNKNOWN`
+    # where an `UNKNOWN` program got to, to run it on from there
+    snapshot: Optional[Snapshot] = None
+
+
+def analyze(code: str,
+            input_string: str = '',
+            max_iter: int = 100_000) -> Analysis:
+    """
+    Work out what a program outputs without running it, where that is easy
+
+    A program is `SILENT` if every `.` is in a loop that can never be
+    entered. Otherwise it is evaluated
+    from the start, as long as every loop it enters has a body of only
+    `+-<>`: such a loop is worked out in one go, from the cells it changes,
+    or found to never end. Cells are assumed not to wrap, like they don't
+    for genes. Anything else, or running out of cycles, gives up.
+
+    Giving up on a loop leaves the work done up to it in a snapshot, so an
+    emulator with the same input and cycle limit can carry on from there
+    rather than run the same commands again.
+
+    :param code: A valid Brainfuck program
+    :param input_string: Input given to the program
+    :param max_iter: Maximum iterations the program can run
+    :return: How the program ends, and its output if known
+    """
+    jumps = BrainfuckEmulator._loop_map(code)
+
+    # the cell is zero at the start and right after a loop, so a loop there
+    # is never entered
+    pptr, zero = 0, True
+    while pptr < len(code) and code[pptr] != '.':
+        if zero and code[pptr] == '[':
+            pptr = jumps[pptr]
+        zero = code[pptr] == ']'
+        pptr += 1
+    if pptr == len(code):
+        return Analysis(SILENT, '')
+
+    tape = collections.defaultdict(int)
+    dptr = pptr = cycles = consumed = 0
+    out = []
+    while pptr < len(code):
+        if cycles > max_iter:
+            return Analysis(UNKNOWN)
+
+        c = code[pptr]
+        if c == '[':
+            end = jumps[pptr]
+            value = tape[dptr]
+            if not value:
+                # `[` jumps onto `]`, which falls through
+                pptr = end + 1
+                cycles += 2
+                continue
+
+            summary = _loop_body(code[pptr + 1:end])
+            if summary is None:
+                return Analysis(UNKNOWN, snapshot=_snapshot(
+                    tape, pptr, dptr, out, cycles, consumed, input_string))
+            ptr, effects = summary
+            step = effects.pop(0, 0)
+            if ptr:
+                if step or effects:
+                    return Analysis(UNKNOWN, snapshot=_snapshot(
+                        tape, pptr, dptr, out, cycles, consumed,
+                        input_string))
+                # a scan, only finitely many cells are non-zero
+                runs = 0
+                while tape[dptr]:
+                    dptr += ptr
+                    runs += 1
+            elif not step or value * step > 0 or value % step:
+                # the counter never gets to zero
+                return Analysis(HANGS, ''.join(out))
+            else:
+                runs = -value // step
+                for offset, delta in effects.items():
+                    tape[dptr + offset] += runs * delta
+                tape[dptr] = 0
+            cycles += runs * (end - pptr + 1)
+            pptr = end + 1
+            continue
+
+        if c == '>':
+            dptr += 1
+        elif c == '<':
+            dptr -= 1
+        elif c == '+':
+            tape[dptr] += 1
+        elif c == '-':
+            tape[dptr] -= 1
+        elif c == '.':
+            if tape[dptr] >= 0:
+                out.append(chr(tape[dptr]))
+        elif c == ',':
+            if consumed < len(input_string):
+                tape[dptr] = ord(input_string[consumed])
+                consumed += 1
+        pptr += 1
+        cycles += 1
+    return Analysis(TRIVIAL, ''.join(out))
+
+
+def _snapshot(tape: Dict[int, int],
+              pptr: int,
+              dptr: int,
+              out: List[str],
+              cycles: int,
+              consumed: int,
+              input_string: str) -> Optional[Snapshot]:
+    """
+    Snapshot of a machine in the state `analyze` got to, about to enter the
+    loop at `pptr`
+
+    :return: The snapshot, None if a cell is too big for an emulator's
+    """
+    lo = min(min(tape, default=0), dptr)
+    hi = max(max(tape, default=0), dptr)
+    try:
+        cells = array('q', [tape.get(pos, 0) for pos in range(lo, hi + 1)])
+    except OverflowError:
+        return None
+    return Snapshot(pptr, dptr, cells, -lo, ''.join(out), cycles, consumed,
+                    input_string)
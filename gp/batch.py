@@ -0,0 +1,252 @@
+import itertools
+import logging
+from array import array
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.cache import Result
+from gp.compiler import CompiledEmulator
+from gp.evaluate import Evaluator
+from gp.gene import Gene
+from gp.trainer import Trainer
+
+# opcodes of the encoded programs, zero pads programs to the same length
+HALT, RIGHT, LEFT, INC, DEC, OUT, IN, OPEN, CLOSE = range(9)
+OPCODES = {
+    '>': RIGHT,
+    '<': LEFT,
+    '+': INC,
+    '-': DEC,
+    '.': OUT,
+    ',': IN,
+    '[': OPEN,
+    ']': CLOSE,
+}
+
+
+def encode(codes: Sequence[str]) -> np.ndarray:
+    """
+    Encode programs as rows of opcodes
+
+    :param codes: Valid Brainfuck programs
+    :return: 2-D uint8 array, one program per row padded with `HALT`
+    """
+    width = max((len(c) for c in codes), default=0) + 1
+    programs = np.zeros((len(codes), width), dtype=np.uint8)
+    for n, code in enumerate(codes):
+        programs[n, :len(code)] = [OPCODES[c] for c in code]
+    return programs
+
+
+class BatchEmulator(object):
+    """
+    Runs a batch of programs in lockstep with NumPy
+
+    Every step executes one command of every machine that is still running,
+    so interpreter overhead is paid per step rather than per program and
+    step. Lockstep pays off for the many short programs in a batch, but
+    stepping the whole batch for a few long running ones costs more than it
+    saves. So once only a few machines are left, or the batch has run for a
+    while, the stragglers are finished one at a time by `CompiledEmulator`,
+    picking up from their current state. Results are the same as running
+    each program through `BrainfuckEmulator`.
+    """
+    log = logging.getLogger(__name__)
+
+    def __init__(self,
+                 codes: Sequence[str],
+                 input_string: str,
+                 max_iter: int,
+                 output_length: Optional[int] = None,
+                 cell_bits: Optional[int] = None,
+                 stragglers: int = 8,
+                 lockstep: int = 200) -> None:
+        """
+        :param codes: Valid Brainfuck programs
+        :param input_string: Input given to every program
+        :param max_iter: Maximum iterations each program can run
+        :param output_length: Stop programs once they have produced this
+            many characters
+        :param cell_bits: Width of wrapping cells, 8, 16 or 32. If None the
+            cells are signed and never wrap.
+        :param stragglers: Number of machines left running at which the
+            rest are finished one by one
+        :param lockstep: Number of steps after which any machines still
+            running are finished one by one
+        """
+        if cell_bits not in (None, 8, 16, 32):
+            raise ValueError('Unsupported cell width: {}'.format(cell_bits))
+
+        self.codes = list(codes)
+        self.programs = encode(self.codes)
+        self.jumps = np.zeros(self.programs.shape, dtype=np.int64)
+        for n, code in enumerate(self.codes):
+            for start, stop in BrainfuckEmulator._loop_map(code).items():
+                self.jumps[n, start] = stop
+
+        self.input_string = input_string
+        self.input = np.array([ord(c) for c in input_string], dtype=np.int64)
+        self.max_iter = max_iter
+        self.output_length = output_length
+        self.cell_bits = cell_bits
+        self.mask = -1 if cell_bits is None else (1 << cell_bits) - 1
+        self.stragglers = stragglers
+        self.lockstep = lockstep
+
+        # tapes start 100 cells wide with the data pointer in the middle, like
+        # `MachineState`
+        self.tapes = np.zeros((len(self.codes), 100), dtype=np.int64)
+        self.origin = 50
+        self.dptr = np.full(len(self.codes), self.origin, dtype=np.int64)
+        self.pptr = np.zeros(len(self.codes), dtype=np.int64)
+        self.cycles = np.zeros(len(self.codes), dtype=np.int64)
+        self.out: List[List[str]] = [[] for _ in self.codes]
+
+    def _grow(self, rows: np.ndarray) -> None:
+        """
+        Widen every tape so the data pointers of `rows` are on the tape,
+        doubling the width on whichever side is too short
+        """
+        width = self.tapes.shape[1]
+        if self.dptr[rows].min() < 0:
+            self.tapes = np.concatenate(
+                [np.zeros_like(self.tapes), self.tapes], axis=1)
+            self.dptr += width
+            self.origin += width
+            width *= 2
+        if self.dptr[rows].max() >= width:
+            self.tapes = np.concatenate(
+                [self.tapes, np.zeros_like(self.tapes)], axis=1)
+
+    def run(self) -> List[str]:
+        """
+        Run every program until it halts, exceeds `max_iter` cycles or has
+        produced `output_length` characters
+
+        :return: The output of every program
+        """
+        lengths = np.array([len(c) for c in self.codes], dtype=np.int64)
+        produced = np.zeros(len(self.codes), dtype=np.int64)
+        consumed = np.zeros(len(self.codes), dtype=np.int64)
+        limit = self.output_length if self.output_length is not None \
+            else np.inf
+
+        # indices of the machines still running
+        rows = np.flatnonzero((lengths > 0) & (limit > 0))
+        steps = 0
+        while rows.size > self.stragglers and steps <= self.max_iter \
+                and steps < self.lockstep:
+            pptr = self.pptr[rows]
+            dptr = self.dptr[rows]
+            op = self.programs[rows, pptr]
+            cell = self.tapes[rows, dptr]
+
+            # `+` and `-`
+            delta = (op == INC).astype(np.int64) - (op == DEC)
+            cell = (cell + delta) & self.mask
+
+            # `,`, leaving the cell alone once input runs out
+            reading = (op == IN) & (consumed[rows] < self.input.size)
+            if reading.any():
+                taken = consumed[rows[reading]]
+                cell[reading] = self.input[taken] & self.mask
+                consumed[rows[reading]] += 1
+            self.tapes[rows, dptr] = cell
+
+            # `.`, the only step that can't be vectorized
+            for n in np.flatnonzero((op == OUT) & (cell >= 0)):
+                self.out[rows[n]].append(chr(cell[n]))
+                produced[rows[n]] += 1
+
+            # `[` and `]` jump onto their match, everything else moves on
+            jump = ((op == OPEN) & (cell == 0)) | ((op == CLOSE) & (cell != 0))
+            self.pptr[rows] = np.where(jump, self.jumps[rows, pptr], pptr + 1)
+
+            # `<` and `>`
+            self.dptr[rows] = dptr + (op == RIGHT) - (op == LEFT)
+            steps += 1
+            self.cycles[rows] = steps
+
+            running = (self.pptr[rows] < lengths[rows]) & \
+                      (produced[rows] < limit)
+            rows = rows[running]
+            if rows.size and (self.dptr[rows].min() < 0 or
+                              self.dptr[rows].max() >= self.tapes.shape[1]):
+                self._grow(rows)
+
+        self.log.debug('Batch of %s programs ran for %s steps',
+                       len(self.codes), steps)
+        if steps <= self.max_iter:
+            for row in rows:
+                self._finish(row, int(produced[row]), int(consumed[row]))
+        return [''.join(out) for out in self.out]
+
+    def _finish(self, row: int, produced: int, consumed: int) -> None:
+        """
+        Run a single machine to the end with `CompiledEmulator`
+
+        :param row: Index of the machine
+        :param produced: Number of characters it has output so far
+        :param consumed: Number of input characters it has read so far
+        """
+        emulator = CompiledEmulator(self.codes[row],
+                                    self.input_string,
+                                    self.max_iter,
+                                    self.cell_bits)
+        emulator.input_pos = consumed
+        tape = emulator.state.tape
+        tape.cells = array(tape.cells.typecode, self.tapes[row].tolist())
+        tape.origin = self.origin
+        emulator.state.dptr = int(self.dptr[row]) - self.origin
+        emulator.state.pptr = int(self.pptr[row])
+        emulator.cycles = int(self.cycles[row])
+        emulator.out = ''.join(self.out[row])
+
+        if self.output_length is None:
+            emulator.run()
+        else:
+            for _ in itertools.islice(emulator.stream(),
+                                      self.output_length - produced):
+                pass
+        self.out[row] = [emulator.out]
+        self.cycles[row] = emulator.cycles
+
+
+class BatchEvaluator(Evaluator):
+    """
+    Evaluates a whole batch of genes in lockstep with `BatchEmulator`, one
+    batch per case of the trainer
+    """
+
+    def __init__(self, max_iter: int = 100_000, lockstep: int = 200) -> None:
+        """
+        :param max_iter: Maximum iterations each program can run
+        :param lockstep: Number of steps to run the batch in lockstep for
+        """
+        self.max_iter = max_iter
+        self.lockstep = lockstep
+
+    def _run(self,
+             trainer: Trainer,
+             genes: List[Gene],
+             threshold: Optional[Union[int, float]] = None) -> List[Result]:
+        # every program runs to the end, which is never wrong for a threshold
+        codes = [g.gene for g in genes]
+        outputs: List[str] = []
+        fitnesses = [0] * len(codes)
+        cycles = [0] * len(codes)
+        for case in trainer.cases():
+            emulator = BatchEmulator(codes,
+                                     case.gen_in(),
+                                     self.max_iter,
+                                     case.output_length(),
+                                     lockstep=self.lockstep)
+            case_outputs = emulator.run()
+            outputs = outputs or case_outputs
+            for n, fitness in enumerate(case.check_fitness_batch(
+                    case_outputs)):
+                fitnesses[n] += fitness
+                cycles[n] += int(emulator.cycles[n])
+        return list(zip(outputs, fitnesses, cycles))
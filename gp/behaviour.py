@@ -0,0 +1,67 @@
+import collections
+from typing import Optional, Tuple, Union
+
+from gp.gene import Gene
+
+# what a gene does, as far as can be told from the results of running it
+Fingerprint = Tuple[str, Union[int, float]]
+
+
+class BehaviourIndex(object):
+    """
+    The shortest, then fastest, gene known for every behaviour
+
+    Different programs often write the same output, and so are clones as far
+    as evolution is concerned. Genes are told apart by their output and
+    their fitness, the output alone being that of the first case only for
+    trainers with many. The index holds on to the most recently seen
+    behaviours, evicting the oldest one when full.
+    """
+
+    def __init__(self, max_entries: int = 2 ** 16) -> None:
+        """
+        :param max_entries: Maximum number of behaviours to remember
+        """
+        self.max_entries = max_entries
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def fingerprint(g: Gene) -> Optional[Fingerprint]:
+        """
+        Fingerprint of what a gene does
+
+        :param g: Gene to fingerprint
+        :return: The fingerprint, None if the gene hasn't been evaluated
+        """
+        if not g.evaluated:
+            return None
+        return g.output(), g.fitness()
+
+    @staticmethod
+    def rank(g: Gene) -> Tuple[int, int]:
+        """Sort key putting the better representative of a behaviour first"""
+        return len(g), g.cycles or 0
+
+    def add(self, g: Gene) -> Gene:
+        """
+        Take note of a gene
+
+        :param g: An evaluated gene
+        :return: The representative of its behaviour: the gene itself if the
+            behaviour is new or it is better than the one known, otherwise
+            the one known
+        """
+        fingerprint = self.fingerprint(g)
+        if fingerprint is None:
+            return g
+
+        known = self.entries.get(fingerprint)
+        if known is None or self.rank(g) < self.rank(known):
+            self.entries[fingerprint] = known = g
+        self.entries.move_to_end(fingerprint)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return known
@@ -1,28 +1,116 @@
 import collections
 import logging
-from typing import Dict
+from array import array
+from typing import (Callable, Container, Dict, Iterator, NamedTuple,
+                    Optional, Tuple)
+
+
+class Tape(object):
+    """
+    Data tape that grows in both directions as cells are written
+
+    Positions are relative to the origin of the tape, so they stay valid
+    when the tape grows to the left. Cells are stored in an `array`, which is
+    doubled in size whenever a write falls outside of it.
+    """
+    __slots__ = ('cells', 'origin', 'mask')
+
+    # array type of wrapping cells, by cell width in bits
+    typecodes = {8: 'B', 16: 'H', 32: 'I', 64: 'Q'}
+
+    def __init__(self,
+                 size: int = 100,
+                 origin: int = 50,
+                 cell_bits: Optional[int] = None) -> None:
+        """
+        Allocate a blank tape
+
+        :param size: Number of cells to allocate up front
+        :param origin: Index of position zero within the allocated cells
+        :param cell_bits: Width of the cells, which then wrap around on
+            overflow. If None the cells are signed and never wrap.
+        """
+        if cell_bits is None:
+            typecode = 'q'
+            self.mask = -1  # `x & -1 == x`, so masking is a no-op
+        elif cell_bits in self.typecodes:
+            typecode = self.typecodes[cell_bits]
+            self.mask = (1 << cell_bits) - 1
+        else:
+            raise ValueError('Unsupported cell width: {}'.format(cell_bits))
+
+        self.cells = array(typecode, [0]) * size
+        self.origin = origin
+
+    def __getitem__(self, pos: int) -> int:
+        """Read the cell at a position, unwritten cells are zero"""
+        i = self.origin + pos
+        if 0 <= i < len(self.cells):
+            return self.cells[i]
+        return 0
+
+    def __setitem__(self, pos: int, value: int) -> None:
+        """Write the cell at a position, wrapping the value if needed"""
+        i = self.origin + pos
+        if not 0 <= i < len(self.cells):
+            self.reserve(pos, pos)
+            i = self.origin + pos
+        self.cells[i] = value & self.mask
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def reserve(self, lo: int, hi: int) -> None:
+        """
+        Make sure every cell from position `lo` to `hi` is allocated
+
+        The tape at least doubles in size on every side it grows, so growing
+        it one cell at a time is amortized constant time.
+
+        :param lo: Lowest position needed
+        :param hi: Highest position needed
+        """
+        cells = self.cells
+        left = -(self.origin + lo)
+        if left > 0:
+            grow = max(left, len(cells))
+            cells[0:0] = array(cells.typecode, [0]) * grow
+            self.origin += grow
+
+        right = self.origin + hi + 1 - len(cells)
+        if right > 0:
+            cells.extend(array(cells.typecode, [0]) * max(right, len(cells)))
 
 
 class MachineState(object):
-    # set data pointer
-    dptr = 50
+    __slots__ = ('dptr', 'pptr', 'tape')
 
-    # set program pointer
-    pptr = 0
+    def __init__(self, cell_bits: Optional[int] = None) -> None:
+        # set data pointer
+        self.dptr = 0
 
-    # initial data tape
-    # TODO: Consider replacing the data list with a dict?
-    data = [0] * 100
+        # set program pointer
+        self.pptr = 0
+
+        # initial data tape, one per machine so emulators don't share cells
+        self.tape = Tape(cell_bits=cell_bits)
+
+
+class Snapshot(NamedTuple):
+    """State of a machine about to run the command at `pptr`"""
+    pptr: int
+    dptr: int
+    cells: array
+    origin: int
+    out: str
+    cycles: int
+    input_pos: int
+    input_string: str  # only valid for machines given the same input
 
 
 class BrainfuckEmulator(object):
     log = logging.getLogger(__name__)
     """Virtual machine that emulates a simple Brainfuck interpreter"""
-    # store a list of states we've seen before
-    # (if we see the exact same one twice, that means we're in an infinite loop)
-    states = set()
-    in_infinite_loop = False
-
     # step of iteration
     cycles = 0
 
@@ -31,17 +119,45 @@ class BrainfuckEmulator(object):
 
     def __init__(self, code: str,
                  input_string: str,
-                 max_iter: int) -> None:
-        self.state = MachineState()
+                 max_iter: int,
+                 cell_bits: Optional[int] = None) -> None:
+        self.state = MachineState(cell_bits)
         self.code: str = code
         self.code_len: int = len(code)
         self.jmp_map: Dict[int, int] = self._loop_map(code)
 
-        self.input_stack: str = input_string
+        # input is read through a cursor rather than consumed, so reading a
+        # character doesn't copy the rest of the input
+        self.input_string: str = input_string
+        self.input_pos: int = 0
 
         self.max_iter: int = max_iter
 
-    def _loop_map(self, code: str) -> Dict[int, int]:
+        # Infinite loop detection, using Brent's algorithm: the machine state
+        # is saved on the 1st, 2nd, 4th, 8th... loop entry and compared on
+        # every entry in between, so only one state is ever kept around.
+        # (if we see the exact same one twice, that means we're in an infinite
+        # loop)
+        self.in_infinite_loop: bool = False
+        self._loop_entries: int = 0
+        self._loop_saved_at: float = 1
+        self._loop_state: Optional[Tuple] = None
+        self._streaming: bool = False
+
+        # dispatch table, built once rather than on every cycle
+        self._commands: Dict[str, Callable[[], None]] = {
+            '>': self.__bf_command_increment_dptr,
+            '<': self.__bf_command_decrement_dptr,
+            '+': self.__bf_command_increment_cell,
+            '-': self.__bf_command_decrement_cell,
+            ',': self.__bf_command_take_input,
+            '.': self.__bf_command_produce_output,
+            '[': self.__bf_command_begin_loop,
+            ']': self.__bf_command_end_loop,
+        }
+
+    @classmethod
+    def _loop_map(cls, code: str) -> Dict[int, int]:
         """
         Build a map of matching brackets, forwards and backwards
 
@@ -57,95 +173,222 @@ class BrainfuckEmulator(object):
                     bmap[n] = stack.pop()  # back ref i.e. pos(']'): pos('[')
                     bmap[bmap[n]] = n  # forward ref i.e pos('['): pos(']')
                 except IndexError as e:
-                    self.log.error(bmap)
-                    self.log.error(code[:n + 1])
+                    cls.log.error(bmap)
+                    cls.log.error(code[:n + 1])
                     raise e
 
         return bmap
 
     def __bf_command_increment_dptr(self) -> None:
+        # the tape only grows once a cell out past its end is written
         self.state.dptr += 1
-        try:
-            __test = self.state.data[self.state.dptr]
-        except IndexError:  # accessing beyond tape end; extend tape
-            self.state.data.append(0)
         self.state.pptr += 1
 
     def __bf_command_decrement_dptr(self) -> None:
-        if self.state.dptr:
-            self.state.dptr -= 1
-        else:
-            self.state.data.insert(0, 0)
+        self.state.dptr -= 1
         self.state.pptr += 1
 
     def __bf_command_increment_cell(self) -> None:
-        self.state.data[self.state.dptr] += 1
+        self.state.tape[self.state.dptr] += 1
         self.state.pptr += 1
 
     def __bf_command_decrement_cell(self) -> None:
-        self.state.data[self.state.dptr] -= 1
+        self.state.tape[self.state.dptr] -= 1
         self.state.pptr += 1
 
     def __bf_command_produce_output(self) -> None:
-        if self.state.data[self.state.dptr] >= 0:
-            self.out += chr(self.state.data[self.state.dptr])
+        if self.state.tape[self.state.dptr] >= 0:
+            self.out += chr(self.state.tape[self.state.dptr])
         self.state.pptr += 1
 
     def __bf_command_take_input(self) -> None:
-        if self.input_stack:
-            self.state.data[self.state.dptr] = ord(self.input_stack[0])
-            self.input_stack: str = self.input_stack[1:]
+        if self.input_pos < len(self.input_string):
+            self.state.tape[self.state.dptr] = \
+                ord(self.input_string[self.input_pos])
+            self.input_pos += 1
         self.state.pptr += 1
 
     def __bf_command_begin_loop(self) -> None:
         # Check that we've been here before
-        current_state = hash(self.state)
-
-        if current_state in self.states:
-            self.in_infinite_loop = True
-        else:
-            self.states.add(current_state)
+        repeat = self._loop_check(self.state.pptr, self.state.dptr,
+                                  self.cycles, len(self.out))
+        if repeat:
+            runs = self._loop_runs(repeat[0], self.cycles)
+            self.cycles += runs * repeat[0]
+            self.out += self.out[len(self.out) - repeat[1]:] * runs
 
         # actual bracket logic
-        if self.state.data[self.state.dptr]:
+        if self.state.tape[self.state.dptr]:
             self.state.pptr += 1
         else:
             self.state.pptr = self.jmp_map[self.state.pptr]
 
     def __bf_command_end_loop(self) -> None:
-        if self.state.data[self.state.dptr]:
+        if self.state.tape[self.state.dptr]:
             self.state.pptr = self.jmp_map[self.state.pptr]
         else:
             self.state.pptr += 1
 
-    def run(self) -> str:
+    def snapshot(self) -> Snapshot:
+        """
+        Copy the state of the machine, so it can be resumed from later on
+
+        :return: A snapshot that doesn't change as the machine keeps running
+        """
+        return Snapshot(self.state.pptr, self.state.dptr,
+                        self.state.tape.cells[:], self.state.tape.origin,
+                        self.out, self.cycles, self.input_pos,
+                        self.input_string)
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """
+        Pick up from a snapshot, which may have been taken by a machine
+        running another program that starts out the same
+
+        :param snapshot: Snapshot taken by a machine with the same input,
+            cycle limit and cell width
+        """
+        self.state.pptr = snapshot.pptr
+        self.state.dptr = snapshot.dptr
+        self.state.tape.cells = snapshot.cells[:]
+        self.state.tape.origin = snapshot.origin
+        self.out = snapshot.out
+        self.cycles = snapshot.cycles
+        self.input_pos = snapshot.input_pos
+
+    def limit(self, max_iter: int) -> None:
         """
+        Change the number of cycles the machine may run for, e.g. to carry
+        on once it has run out of them
+
+        Loop detection stops looking once it has found a loop, so it is
+        started over: otherwise a loop found under the old limit would be
+        stepped through one cycle at a time up to the new one.
+
+        :param max_iter: Maximum iterations the program can run
+        """
+        self.max_iter = max_iter
+        self._loop_entries = 0
+        self._loop_saved_at = 1
+        self._loop_state = None
+
+    def _loop_check(self,
+                    pptr: int,
+                    dptr: int,
+                    cycles: int,
+                    produced: int) -> Optional[Tuple[int, int]]:
+        """
+        Check whether the machine is entering a loop in a state it was in
+        before, in which case it will keep repeating itself until it runs out
+        of cycles
+
+        :param pptr: Position of the `[` being entered
+        :param dptr: Current data pointer
+        :param cycles: Cycles used so far
+        :param produced: Length of the output so far
+        :return: Cycles and output characters per repetition, if the loop
+            can be skipped over. Loops that produce output aren't skipped
+            while streaming, so the consumer can stop on the exact cycle.
+        """
+        tape = self.state.tape
+        saved = self._loop_state
+        if saved is not None and saved[:4] == (pptr, dptr,
+                                               self.input_pos,
+                                               tape.origin) \
+                and saved[4] == tape.cells:
+            # nothing past this point can change, stop looking
+            self.in_infinite_loop = True
+            self._loop_state = None
+            self._loop_saved_at = float('inf')
+            if self._streaming and produced != saved[6]:
+                return None
+            return cycles - saved[5], produced - saved[6]
+
+        self._loop_entries += 1
+        if self._loop_entries == self._loop_saved_at:
+            self._loop_saved_at *= 2
+            self._loop_state = (pptr, dptr, self.input_pos,
+                                tape.origin, tape.cells[:], cycles, produced)
+        return None
+
+    def _loop_runs(self, period: int, cycles: int) -> int:
+        """
+        How many times a repeating stretch of `period` cycles can be skipped
+        over without changing where the program stops
+
+        At least one cycle is left over for the `[` being entered.
+
+        :param period: Cycles per repetition
+        :param cycles: Cycles used so far
+        :return: Number of repetitions to skip
+        """
+        return (self.max_iter - cycles) // period
+
+    def _step(self) -> None:
+        """
+        Execute the single command under the program pointer
+
         This functions as a switch statement...
         A large amount of time was spent at each "elif" branch, so this
         _should_ be faster
+        """
+        self._commands[self.code[self.state.pptr]]()
+        self.cycles += 1
+
+    def _interpret(self,
+                   limit: int,
+                   stop_at: Container[int] = ()) -> Iterator[str]:
+        """
+        Step through the program one command at a time
+
+        :param limit: Total number of cycles the program may use
+        :param stop_at: Program positions to pause at
+        :return: Generator of output characters, as they are produced
+        """
+        produced = len(self.out)
+        while self.state.pptr < self.code_len and self.cycles < limit:
+            if self.state.pptr in stop_at:
+                return
+            self._step()
+
+            if len(self.out) != produced:
+                yield from self.out[produced:]
+                produced = len(self.out)
+
+    def _execute(self, stream: bool) -> Iterator[str]:
+        """
+        Run the program from wherever it currently is
+
+        :param stream: Whether output is being consumed as it is produced
+        :return: Generator of output characters, as they are produced
+        """
+        self._streaming = stream
+        return self._interpret(self.max_iter + 1)
+
+    def stream(self) -> Iterator[str]:
+        """
+        Run the program, producing its output one character at a time
+
+        Execution is suspended whenever a character is produced, so the
+        consumer can stop the program as soon as it has seen enough. Calling
+        `stream` or `run` again picks up where the previous call stopped.
+
+        :return: Generator of output characters
+        """
+        return self._execute(True)
+
+    def run(self) -> str:
+        """
+        Run the program until it halts or exceeds `max_iter` cycles
+
         :return: the program output
         """
-        while self.state.pptr < self.code_len:
-            {
-                '>': self.__bf_command_increment_dptr,
-                '<': self.__bf_command_decrement_dptr,
-                '+': self.__bf_command_increment_cell,
-                '-': self.__bf_command_decrement_cell,
-                ',': self.__bf_command_take_input,
-                '.': self.__bf_command_produce_output,
-                '[': self.__bf_command_begin_loop,
-                ']': self.__bf_command_end_loop,
-            }[self.code[self.state.pptr]]()
-            self.cycles += 1
-
-            if self.in_infinite_loop:
-                # We return from here _a lot_, let's not log it
-                return self.out
-
-            if self.cycles > self.max_iter:
-                self.log.debug('Max iteration of %s cycles, returning early',
-                               self.max_iter)
-                return self.out
-
-        self.log.debug('Program completed in %s cycles', self.cycles)
+        for _ in self._execute(False):
+            pass
+
+        if self.cycles > self.max_iter:
+            self.log.debug('Max iteration of %s cycles, returning early',
+                           self.max_iter)
+        else:
+            self.log.debug('Program completed in %s cycles', self.cycles)
         return self.out
@@ -0,0 +1,105 @@
+import collections
+import logging
+from typing import Hashable, Optional, Tuple, Union
+
+# pairs of commands that undo each other
+INVERSES = {'+': '-', '-': '+', '>': '<', '<': '>'}
+
+# (output, fitness, cycles) of a program, without output if it was stopped
+# early and the fitness is only a lower bound
+Result = Tuple[Optional[str], Union[int, float], Optional[int]]
+
+
+def canonical(code: str) -> str:
+    """
+    Strip commands that can't change what a program does
+
+    Removed are adjacent pairs that undo each other (`+-`, `-+`, `<>`, `><`)
+    and loops `[]` that can't be entered, because they come first or right
+    after another loop, where the current cell is always zero. Removing a
+    pair can bring together a new one, e.g. `+<>-`, which is removed too.
+
+    Only the number of cycles a program takes changes, which matters only for
+    programs that run out of cycles.
+
+    :param code: A valid Brainfuck program
+    :return: The program with all such no-ops removed
+    """
+    stack = []
+    for c in code:
+        if stack and INVERSES.get(c) == stack[-1]:
+            stack.pop()
+        elif c == ']' and stack and stack[-1] == '[' \
+                and (len(stack) == 1 or stack[-2] == ']'):
+            stack.pop()
+        else:
+            stack.append(c)
+    return ''.join(stack)
+
+
+class FitnessCache(object):
+    """
+    Least recently used cache of program results, shared between genes
+
+    Programs are looked up by their canonical form, so genes that differ
+    only by no-ops share an entry.
+    """
+    log = logging.getLogger(__name__)
+
+    def __init__(self, max_entries: int = 2 ** 16) -> None:
+        """
+        :param max_entries: Number of results kept before the least recently
+            used is evicted
+        """
+        self.max_entries = max_entries
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def key(trainer: Hashable, code: str) -> Tuple[Hashable, str]:
+        """Key of a program scored by a particular trainer"""
+        return trainer, canonical(code)
+
+    def get(self, trainer: Hashable, code: str) -> Optional[Result]:
+        """
+        Look up the result of a program
+
+        :param trainer: Trainer that scored the program
+        :param code: Program to look up
+        :return: Output, fitness and cycles of the program, if known
+        """
+        key = self.key(trainer, code)
+        try:
+            result = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, trainer: Hashable, code: str, result: Result) -> None:
+        """
+        Store the result of a program, evicting the oldest entry when full
+
+        :param trainer: Trainer that scored the program
+        :param code: Program that was run
+        :param result: Output, fitness and cycles of the program
+        """
+        key = self.key(trainer, code)
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Forget every result and reset the counters"""
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
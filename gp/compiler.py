@@ -0,0 +1,404 @@
+import bisect
+import logging
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from gp.brainfuck_machine import BrainfuckEmulator, Snapshot
+
+# IR opcodes
+ADD = 0  # add `arg` to the current cell
+MOVE = 1  # move the data pointer by `arg`
+OUT = 2  # write the current cell to output
+IN = 3  # read one character of input into the current cell
+OPEN = 4  # `[`, jump to op `arg` when the current cell is zero
+CLOSE = 5  # `]`, jump to op `arg` when the current cell is non-zero
+CLEAR = 6  # `[-]` / `[+]`, count the current cell down by `step` to zero
+MUL = 7  # `[->+<]`, add the counter times each (offset, delta) in `arg`
+SCAN = 8  # `[>]`, move by `step` until a zero cell is found
+
+# source characters lowered one-to-one into the IR
+SIMPLE = {
+    '+': (ADD, 1),
+    '-': (ADD, -1),
+    '>': (MOVE, 1),
+    '<': (MOVE, -1),
+    '.': (OUT, 0),
+    ',': (IN, 0),
+    '[': (OPEN, 0),
+    ']': (CLOSE, 0),
+}
+
+
+class Op(NamedTuple):
+    """A single IR instruction covering `size` characters from `pos`"""
+    kind: int
+    pos: int
+    arg: object = 0
+    step: int = 0
+    size: int = 1
+
+
+def lower(code: str) -> List[Op]:
+    """
+    Translate Brainfuck source into IR, one op per command
+
+    :param code: A valid Brainfuck program
+    :return: Unoptimized IR
+    """
+    return [Op(SIMPLE[c][0], n, SIMPLE[c][1]) for n, c in enumerate(code)]
+
+
+def fold(ops: List[Op]) -> List[Op]:
+    """
+    Merge runs of `+-` and `<>` into a single op
+
+    The folded op keeps the number of commands it replaces in `size`, which
+    is also the number of cycles it costs to execute.
+
+    :param ops: IR to optimize
+    :return: Optimized IR
+    """
+    folded: List[Op] = []
+    for op in ops:
+        if folded and op.kind in (ADD, MOVE) and folded[-1].kind == op.kind:
+            last = folded[-1]
+            folded[-1] = last._replace(arg=last.arg + op.arg,
+                                       size=last.size + op.size)
+        else:
+            folded.append(op)
+    return folded
+
+
+def _loop_body(code: str) -> Optional[Tuple[int, Dict[int, int]]]:
+    """
+    Summarize a loop body made only of `+-<>`
+
+    :param code: Loop body, without the surrounding brackets
+    :return: Net pointer movement and per-offset cell deltas, or None if the
+        body contains anything else
+    """
+    ptr, effects = 0, {}
+    for c in code:
+        if c == '>':
+            ptr += 1
+        elif c == '<':
+            ptr -= 1
+        elif c in '+-':
+            effects[ptr] = effects.get(ptr, 0) + (1 if c == '+' else -1)
+        else:
+            return None
+    return ptr, {k: v for k, v in effects.items() if v}
+
+
+def fuse(ops: List[Op], code: str) -> List[Op]:
+    """
+    Replace innermost loops with a known closed form by a single op
+
+    Recognized are clear loops (`[-]`), multiply / copy loops (`[->++<]`)
+    whose counter cell changes by exactly one per iteration, and scan loops
+    (`[>]`, `[<<]`).
+
+    :param ops: IR to optimize
+    :param code: Source the IR was lowered from
+    :return: Optimized IR
+    """
+    fused: List[Op] = []
+    for op in ops:
+        fused.append(op)
+        if op.kind != CLOSE:
+            continue
+
+        # find the matching `[`, giving up if the body has nested loops
+        start = len(fused) - 2
+        while start >= 0 and fused[start].kind in (ADD, MOVE):
+            start -= 1
+        if start < 0 or fused[start].kind != OPEN:
+            continue
+
+        pos = fused[start].pos
+        size = op.pos - pos + 1
+        summary = _loop_body(code[pos + 1:op.pos])
+        if summary is None:
+            continue
+        ptr, effects = summary
+
+        if ptr == 0 and effects.get(0) in (-1, 1):
+            step = effects.pop(0)
+            if effects:
+                loop = Op(MUL, pos, tuple(sorted(effects.items())), step, size)
+            else:
+                loop = Op(CLEAR, pos, 0, step, size)
+        elif ptr and not effects:
+            loop = Op(SCAN, pos, 0, ptr, size)
+        else:
+            continue
+
+        del fused[start:]
+        fused.append(loop)
+    return fused
+
+
+def link(ops: List[Op]) -> List[Op]:
+    """
+    Resolve the jump targets of the remaining `[` and `]` ops
+
+    Both brackets jump onto their match rather than past it, so the bracket
+    is re-tested (and charged a cycle) just like in the interpreter.
+
+    :param ops: IR to link
+    :return: Linked IR
+    """
+    stack, linked = [], list(ops)
+    for n, op in enumerate(linked):
+        if op.kind == OPEN:
+            stack.append(n)
+        elif op.kind == CLOSE:
+            start = stack.pop()
+            linked[start] = linked[start]._replace(arg=n)
+            linked[n] = op._replace(arg=start)
+    return linked
+
+
+def compile_program(code: str) -> List[Op]:
+    """
+    Lower a Brainfuck program into optimized, linked IR
+
+    :param code: A valid Brainfuck program
+    :return: IR ready to be executed by `CompiledEmulator`
+    """
+    return link(fuse(fold(lower(code)), code))
+
+
+class CompiledEmulator(BrainfuckEmulator):
+    """
+    Emulator that executes a program's IR instead of its source
+
+    Output and cycle counts are identical to `BrainfuckEmulator`: every op
+    is charged the number of commands the interpreter would have executed.
+    When an op does not fit in the remaining cycle budget the emulator falls
+    back to stepping the interpreter, so a run that is cut short stops on
+    exactly the same command.
+
+    If `snapshots` is set to a list, the emulator appends a snapshot to it
+    whenever it reaches an op outside of any loop at least `snapshot_gap`
+    cycles after the previous one. The program is past every loop before
+    such an op for good, so another program that only differs from there on
+    can resume from the snapshot.
+    """
+    log = logging.getLogger(__name__)
+
+    # minimum number of cycles between snapshots
+    snapshot_gap = 32
+
+    def __init__(self, code: str,
+                 input_string: str,
+                 max_iter: int,
+                 cell_bits: Optional[int] = None) -> None:
+        super().__init__(code, input_string, max_iter, cell_bits)
+        self.ops: List[Op] = compile_program(code)
+
+        # map of source position to the op starting there
+        self.op_at: Dict[int, int] = {op.pos: n for n, op in
+                                      enumerate(self.ops)}
+        self.op_at[self.code_len] = len(self.ops)
+
+        # ops outside of any loop, in order
+        self.top: List[int] = []
+        depth = 0
+        for n, op in enumerate(self.ops):
+            if not depth:
+                self.top.append(n)
+            depth += (op.kind == OPEN) - (op.kind == CLOSE)
+
+        self.snapshots: Optional[List[Snapshot]] = None
+        self._snapshot_cycles = 0
+
+    def restore(self, snapshot):
+        super().restore(snapshot)
+        self._snapshot_cycles = snapshot.cycles
+
+    def _iterations(self, op: Op, value: int) -> Optional[int]:
+        """
+        Number of times a fused loop body runs
+
+        :param op: `CLEAR` or `MUL` op
+        :param value: Value of the counter cell on entry, non-zero
+        :return: Iteration count, or None if the loop never terminates
+        """
+        mask = self.state.tape.mask
+        if mask != -1:  # wrapping cells always reach zero eventually
+            return (-value * op.step) & mask
+        if value * op.step < 0:
+            return -value * op.step
+        return None
+
+    def _grow(self, i: int, lo: int, hi: int) -> int:
+        """
+        Grow the tape so that cells `i + lo` to `i + hi` exist
+
+        :param i: Index of the data pointer into the tape's cells
+        :return: The index of the data pointer after growing
+        """
+        tape = self.state.tape
+        dptr = i - tape.origin
+        tape.reserve(dptr + lo, dptr + hi)
+        return tape.origin + dptr
+
+    def _sync(self, out: List[str], i: int, cycles: int, index: int) -> None:
+        """
+        Write the state kept in local variables by `_execute` back to the
+        machine
+
+        :param out: Output produced since the last sync, emptied
+        :param i: Index of the data pointer into the tape's cells
+        :param cycles: Cycles used so far
+        :param index: Index of the next op to run
+        """
+        self.out += ''.join(out)
+        out.clear()
+        self.state.dptr = i - self.state.tape.origin
+        self.state.pptr = self.ops[index].pos if index < len(self.ops) \
+            else self.code_len
+        self.cycles = cycles
+
+    def _execute(self, stream: bool) -> Iterator[str]:
+        """
+        Run the program from wherever it currently is
+
+        :param stream: Whether output is being consumed as it is produced.
+            If not, output is only collected once the run is over.
+        :return: Generator of output characters, as they are produced
+        """
+        self._streaming = stream
+        limit = self.max_iter + 1
+        yield from self._interpret(limit, self.op_at)
+        if self.state.pptr not in self.op_at:
+            return  # out of cycles part way through an op
+
+        state = self.state
+        tape = state.tape
+        tape.reserve(state.dptr, state.dptr)
+        cells = tape.cells
+        mask = tape.mask
+        ops = self.ops
+        n_ops = len(ops)
+        p = tape.origin + state.dptr  # index of the data pointer into cells
+        cycles = self.cycles
+        out = []
+
+        i = self.op_at[state.pptr]
+
+        # next op outside of any loop, if snapshots are being taken
+        top = self.top if self.snapshots is not None else []
+        k = bisect.bisect_left(top, i)
+        mark = top[k] if k < len(top) else -1
+
+        while i < n_ops:
+            if i == mark:
+                if cycles - self._snapshot_cycles >= self.snapshot_gap:
+                    self._sync(out, p, cycles, i)
+                    self.snapshots.append(self.snapshot())
+                    self._snapshot_cycles = cycles
+                k += 1
+                mark = top[k] if k < len(top) else -1
+
+            kind, pos, arg, step, size = ops[i]
+
+            if kind == ADD:
+                if cycles + size > limit:
+                    break
+                cells[p] = (cells[p] + arg) & mask
+                cycles += size
+            elif kind == MOVE:
+                if cycles + size > limit:
+                    break
+                p += arg
+                if not 0 <= p < len(cells):
+                    p = self._grow(p, 0, 0)
+                cycles += size
+            elif kind == OPEN:
+                if cycles >= limit:
+                    break
+                repeat = self._loop_check(pos, p - tape.origin, cycles,
+                                          len(self.out) + len(out))
+                if repeat:
+                    self._sync(out, p, cycles, i)
+                    runs = self._loop_runs(repeat[0], cycles)
+                    chunk = self.out[len(self.out) - repeat[1]:] * runs
+                    cycles += runs * repeat[0]
+                    self._sync([chunk], p, cycles, i)
+                cycles += 1
+                if not cells[p]:
+                    i = arg
+                    continue
+            elif kind == CLOSE:
+                if cycles >= limit:
+                    break
+                cycles += 1
+                if cells[p]:
+                    i = arg
+                    continue
+            elif kind == OUT:
+                if cycles >= limit:
+                    break
+                cycles += 1
+                if cells[p] >= 0:
+                    out.append(chr(cells[p]))
+                    if stream:
+                        i += 1
+                        self._sync(out, p, cycles, i)
+                        yield self.out[-1]
+                        continue
+            elif kind == IN:
+                if cycles >= limit:
+                    break
+                self._sync(out, p, cycles, i)
+                self._step()
+                cycles = self.cycles
+            else:
+                value = cells[p]
+                if not value:
+                    # `[` jumps onto `]`, which falls through
+                    if cycles + 2 > limit:
+                        break
+                    cycles += 2
+                    i += 1
+                    continue
+
+                # the interpreter runs `size` commands per iteration
+                if kind == SCAN:
+                    runs = 0
+                    budget = (limit - cycles) // size + 1
+                    j = p
+                    while runs < budget and 0 <= j < len(cells) and cells[j]:
+                        j += step
+                        runs += 1
+                else:
+                    runs = self._iterations(ops[i], value)
+
+                done = runs is not None and cycles + runs * size <= limit
+                if not done:
+                    # only run the iterations that fit, the interpreter
+                    # finishes off the partial one below
+                    runs = (limit - cycles) // size
+
+                if kind == SCAN:
+                    p += runs * step
+                    if not 0 <= p < len(cells):
+                        p = self._grow(p, 0, 0)
+                elif kind == CLEAR:
+                    cells[p] = (value + runs * step) & mask
+                else:
+                    if p + arg[0][0] < 0 or p + arg[-1][0] >= len(cells):
+                        p = self._grow(p, arg[0][0], arg[-1][0])
+                    cells[p] = (value + runs * step) & mask
+                    for offset, delta in arg:
+                        j = p + offset
+                        cells[j] = (cells[j] + runs * delta) & mask
+                cycles += runs * size
+
+                if not done:
+                    break
+            i += 1
+
+        self._sync(out, p, cycles, i)
+        yield from self._interpret(limit)
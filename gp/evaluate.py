@@ -0,0 +1,242 @@
+import asyncio
+import collections
+import concurrent.futures
+import logging
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from gp import metrics
+from gp.cache import Result, canonical
+from gp.gene import Gene
+from gp.trainer import Trainer
+
+
+def score(trainer: Trainer,
+          genes: Sequence[Gene],
+          threshold: Optional[Union[int, float]] = None) -> List[Result]:
+    """
+    Run a chunk of genes, kept at module level so worker processes can
+    unpickle it
+
+    Genes pick up from the snapshots they inherited from their parent. Run
+    in another process, the snapshots a gene takes itself stay behind in
+    the worker's copy.
+
+    :param trainer: Trainer to score the programs with
+    :param genes: Genes to run
+    :param threshold: Stop programs once their fitness is known to be at
+        least this
+    :return: Output, fitness and cycles of every program. Programs that were
+        stopped early have no output and a lower bound for a fitness.
+    """
+    results = []
+    for g in genes:
+        # the caller has already missed the cache, so don't look again
+        fitness = g.run(threshold)
+        if fitness is None:
+            results.append((None, g.bound, g.cycles))
+        else:
+            results.append((g.output(), fitness, g.cycles))
+    return results
+
+
+def score_counted(trainer: Trainer,
+                  genes: Sequence[Gene],
+                  threshold: Optional[Union[int, float]] = None) \
+        -> Tuple[List[Result], collections.Counter]:
+    """
+    `score` a chunk of genes in a worker process, along with the events
+    counted there while running them, which would otherwise stay behind
+
+    :return: Results of `score`, and the events counted
+    """
+    before = metrics.events.copy()
+    results = score(trainer, genes, threshold)
+    return results, metrics.events - before
+
+
+class Evaluator(object):
+    """Scores whole batches of genes at once"""
+    log = logging.getLogger(__name__)
+
+    # genes run, rather than found in the cache, and the cycles they took
+    runs = 0
+    cycles = 0
+
+    def evaluate(self,
+                 trainer: Trainer,
+                 genes: Sequence[Gene],
+                 threshold: Optional[Union[int, float]] = None) \
+            -> List[Union[int, float]]:
+        """
+        Make sure every gene has been evaluated
+
+        :param trainer: Trainer the genes were created with
+        :param genes: Genes to evaluate
+        :param threshold: Fitness at which genes are of no use. Genes are
+            stopped as soon as their fitness is known to be at least this.
+        :return: Fitness of every gene, or a lower bound of at least
+            `threshold` for genes that were stopped early
+        """
+        batch = self._pending(genes)
+        if batch:
+            self._load(batch, self._run(trainer,
+                                        [same[0] for same in batch],
+                                        threshold))
+        return [g.fitness(threshold) for g in genes]
+
+    async def evaluate_async(self,
+                             trainer: Trainer,
+                             genes: Sequence[Gene],
+                             threshold: Optional[Union[int, float]] = None,
+                             executor: Optional[
+                                 concurrent.futures.Executor] = None) \
+            -> List[Union[int, float]]:
+        """
+        Make sure every gene has been evaluated, like `evaluate`, without
+        blocking the event loop
+
+        The genes are run on `executor`, while the shared cache is only used
+        from the event loop's thread.
+
+        :param trainer: Trainer the genes were created with
+        :param genes: Genes to evaluate
+        :param threshold: Fitness at which genes are of no use
+        :param executor: Executor to run the genes on, the event loop's
+            default one if None
+        :return: Fitness of every gene, or a lower bound of at least
+            `threshold` for genes that were stopped early
+        """
+        batch = self._pending(genes)
+        if batch:
+            loop = asyncio.get_running_loop()
+            self._load(batch, await loop.run_in_executor(
+                executor, self._run, trainer, [same[0] for same in batch],
+                threshold))
+        return [g.fitness(threshold) for g in genes]
+
+    @staticmethod
+    def _pending(genes: Sequence[Gene]) -> List[List[Gene]]:
+        """Genes that aren't in the cache, grouped by the program they are"""
+        # only run one of the genes that are the same program
+        pending: Dict[str, List[Gene]] = {}
+        for g in genes:
+            if not g.lookup():
+                pending.setdefault(canonical(g.gene), []).append(g)
+        return list(pending.values())
+
+    def _load(self,
+              batch: List[List[Gene]],
+              results: List[Result]) -> None:
+        """Give every group of pending genes the result of its program"""
+        self.runs += len(batch)
+        for same, (output, fitness, cycles) in zip(batch, results):
+            self.cycles += cycles or 0
+            share = self._exact(same[0])
+            for g in same:
+                if output is None:
+                    g.reject(fitness)
+                else:
+                    g.load(output, fitness, cycles, share)
+
+    def _exact(self, g: Gene) -> bool:
+        """
+        Whether the result `_run` gave a gene is that of running it as far as
+        `max_iter`, so that it can go in the shared cache
+
+        :param g: Gene that was run
+        """
+        return True
+
+    def _run(self,
+             trainer: Trainer,
+             genes: List[Gene],
+             threshold: Optional[Union[int, float]] = None) -> List[Result]:
+        """Run and score a list of genes, in order"""
+        return score(trainer, genes, threshold)
+
+    def close(self) -> None:
+        """Release any workers held by the evaluator"""
+        pass
+
+
+class SerialEvaluator(Evaluator):
+    """Evaluates genes one after another in the current thread"""
+
+
+class PoolEvaluator(Evaluator):
+    """
+    Evaluates genes on a pool of workers
+
+    Programs are sent out in chunks rather than one at a time, so that the
+    cost of shipping a task to a worker isn't paid per (often very short)
+    program.
+    """
+    executor_type = concurrent.futures.Executor
+
+    # whether workers run in processes of their own, so events counted while
+    # running genes have to be sent back
+    remote = False
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 chunks_per_worker: int = 4) -> None:
+        """
+        :param workers: Number of workers, defaults to one per core
+        :param chunks_per_worker: Number of chunks each worker gets per batch
+        """
+        self.workers = workers
+        self.chunks_per_worker = chunks_per_worker
+        self._executor: Optional[concurrent.futures.Executor] = None
+        # batches can be run from several threads at once
+        self._lock = threading.Lock()
+
+    def _run(self, trainer, genes, threshold=None):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self.executor_type(self.workers)
+        workers = self.workers or os.cpu_count() or 1
+        size = math.ceil(len(genes) / (workers * self.chunks_per_worker))
+        chunks = [genes[i:i + size] for i in range(0, len(genes), size)]
+
+        results = []
+        for chunk in self._executor.map(score_counted if self.remote
+                                        else score,
+                                        [trainer] * len(chunks),
+                                        chunks,
+                                        [threshold] * len(chunks)):
+            if self.remote:
+                chunk, counted = chunk
+                metrics.events.update(counted)
+            results.extend(chunk)
+        return results
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class ThreadEvaluator(PoolEvaluator):
+    """Evaluates genes on a pool of threads"""
+    executor_type = concurrent.futures.ThreadPoolExecutor
+
+
+class ProcessEvaluator(PoolEvaluator):
+    """Evaluates genes on a pool of processes"""
+    executor_type = concurrent.futures.ProcessPoolExecutor
+    remote = True
+
+
+def make_evaluator(workers: int = 1) -> Evaluator:
+    """
+    Pick an evaluator for a number of worker processes
+
+    :param workers: Number of processes, 0 for one per core
+    :return: A serial evaluator for a single worker, a process pool otherwise
+    """
+    if workers == 1:
+        return SerialEvaluator()
+    return ProcessEvaluator(workers or None)
@@ -1,44 +1,155 @@
+import collections
+import contextlib
 import datetime
 import logging
+import math
 import random
-from typing import List, Tuple
+import statistics
+import time
+from typing import (Dict, Iterator, List, Optional, Sequence, Tuple,
+                    Union)
 
 import termcolor
 
+from gp.behaviour import BehaviourIndex, Fingerprint
+from gp.evaluate import Evaluator, make_evaluator
+from gp.generate import DonorPool
+from gp.metrics import GenerationRecord, Sink
+from gp.selection import RouletteSelector, Selector
 from gp.trainer import Trainer
-from . import gene, utils
+from . import gene, metrics, mutation, utils
 from .gene import Gene
 
 
 class Evolve(object):
     log = logging.getLogger(__name__)
 
-    def __init__(self, trainer: Trainer, genes_per_gen: int = 24) -> None:
+    # children in a row that beat the worst gene but behave like one in the
+    # generation being made, after which such clones are let in anyway:
+    # there may be no new behaviours left that beat it
+    clone_limit = 1_000
+
+    def __init__(self,
+                 trainer: Trainer,
+                 genes_per_gen: int = 24,
+                 workers: int = 1,
+                 evaluator: Optional[Evaluator] = None,
+                 selector: Optional[Selector] = None,
+                 dedup: bool = False) -> None:
         """
         Set up the Evolve-r with the program trainer and number of genes per
         generation
+
+        :param workers: Number of processes to evaluate genes on, 0 for one
+            per core
+        :param evaluator: Evaluator to use instead of one made for `workers`
+        :param selector: How parents are picked, by default in inverse
+            proportion to their fitness
+        :param dedup: Keep genes that behave the same as one already in the
+            generation out of it, and admit the shortest gene known to behave
+            like a new one instead of it
         """
         self.trainer = trainer
         self.per_gen = genes_per_gen
+        self.evaluator = evaluator or make_evaluator(workers)
+        self.selector = selector or RouletteSelector()
+        self.behaviours = BehaviourIndex() if dedup else None
+
+        # random programs to seed the first generation and breed with
+        self.donors = DonorPool(350, 75)
+
+        # where the record of every generation goes, and what goes into the
+        # record of the one being made
+        self.sinks: List[Sink] = []
+        self._times: collections.Counter = collections.Counter()
+        self._rejected = 0
+        self._mark = self._counts()
+
+        # the generation last admitted to, with the place of every behaviour
+        # in it and its length then, see `admit`
+        self._building: Optional[List[Gene]] = None
+        self._places: Dict[Fingerprint, int] = {}
+        self._built = 0
+
+    def add_sink(self, sink: Sink) -> None:
+        """Send the record of every generation from now on to a sink"""
+        self.sinks.append(sink)
+
+    @contextlib.contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in a block to a phase of the generation"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._times[name] += time.perf_counter() - start
+
+    def _counts(self) -> Tuple[Union[int, float], ...]:
+        """Running totals, the difference of which goes into a record"""
+        return (self.evaluator.runs,
+                self.evaluator.cycles,
+                metrics.events[metrics.TIMEOUTS],
+                metrics.events[metrics.INFINITE_LOOPS],
+                Gene.cache.hits if Gene.cache is not None else 0,
+                time.perf_counter())
+
+    def report(self, number: int, generation: Sequence[Gene]) -> None:
+        """
+        Send the record of a generation to every sink, and start counting for
+        the next one
+
+        :param number: Number of the generation, generation zero being 0
+        :param generation: The generation
+        """
+        counts = self._counts()
+        if self.sinks:
+            evaluations, cycles, timeouts, loops, hits, wall = (
+                now - before for now, before in zip(counts, self._mark))
+            fitnesses = sorted(g.fitness() for g in generation)
+            best = min(generation, key=lambda x: x.fitness())
+            details = any(sink.details for sink in self.sinks)
+            record = GenerationRecord(
+                number, evaluations, cycles, timeouts, loops, self._rejected,
+                hits, self._times['select'], self._times['mutate'],
+                self._times['evaluate'], wall,
+                fitnesses[0], statistics.median(fitnesses),
+                best.gene if details else None,
+                utils.visualize_control_chars(best.output()) if details
+                else None)
+            for sink in self.sinks:
+                sink.record(record)
+
+        self._mark = counts
+        self._times.clear()
+        self._rejected = 0
 
     def generate_solution(self) -> str:
         """Create a genetic program that solves the defined problem"""
         generation_counter = 0
         start = datetime.datetime.now()
 
-        current_generation = self.generation_zero()
-        while current_generation[0].fitness() != 0:
-            self.log.debug('=' * 79)
-            current_generation = self.offspring(current_generation)
-
-            generation_counter += 1
-            self.log.debug(
-                termcolor.colored('[Gen #{}]\t'.format(generation_counter),
-                                  color='magenta'))
-            stop = datetime.datetime.now()
-            self.log.debug(
-                termcolor.colored('[{}]\t'.format(str(stop - start)[:7]),
-                                  color='blue'))
+        self._mark = self._counts()
+        try:
+            current_generation = self.generation_zero()
+            self.report(generation_counter, current_generation)
+            while current_generation[0].fitness() != 0:
+                self.log.debug('=' * 79)
+                current_generation = self.offspring(current_generation)
+
+                generation_counter += 1
+                self.report(generation_counter, current_generation)
+                if self.log.isEnabledFor(logging.DEBUG):
+                    self.log.debug(termcolor.colored(
+                        '[Gen #{}]\t'.format(generation_counter),
+                        color='magenta'))
+                    stop = datetime.datetime.now()
+                    self.log.debug(termcolor.colored(
+                        '[{}]\t'.format(str(stop - start)[:7]),
+                        color='blue'))
+        finally:
+            self.evaluator.close()
+            for sink in self.sinks:
+                sink.close()
 
         return current_generation[0].gene
 
@@ -47,32 +158,48 @@ class Evolve(object):
         program_generation = []
         gen_round = 0
         while len(program_generation) < self.per_gen:
-            g = gene.Gene(self.trainer, gene.Gene.gen(350, 75))
-            fitness = g.fitness()
-
-            gen_round += 1
-
-            if fitness != float('inf'):
-                # debugging information
-                self.log.debug('=' * 79)
-
-                # loop through code to print it nicely
-                tmp_g = g.gene
-                while tmp_g:
-                    self.log.debug(tmp_g[:79])
-                    tmp_g = tmp_g[79:]
-
-                self.log.debug(
-                    termcolor.colored(
-                        'Number:\t{}\t'
-                        'Round:\t{}\t'
-                        'Fit:\t{}\n'.format(
-                            len(program_generation) + 1,
-                            gen_round + 1,
-                            fitness), color='green'))
-                self.log.info(utils.visualize_control_chars(g[:79]))
+            # evaluate as many candidates at once as there are places left
+            missing = self.per_gen - len(program_generation)
+            with self._phase('mutate'):
+                candidates = [gene.Gene(self.trainer, self.donors.draw())
+                              for _ in range(missing)]
+            with self._phase('evaluate'):
+                fitnesses = self.evaluator.evaluate(self.trainer, candidates)
+
+            for g, fitness in zip(candidates, fitnesses):
+                gen_round += 1
+
+                if fitness == float('inf'):
+                    self._rejected += 1
+                    continue
 
-                program_generation.append(g)
+                # debugging information, only formatted if it is logged
+                if self.log.isEnabledFor(logging.DEBUG):
+                    self.log.debug('=' * 79)
+
+                    # loop through code to print it nicely
+                    tmp_g = g.gene
+                    while tmp_g:
+                        self.log.debug(tmp_g[:79])
+                        tmp_g = tmp_g[79:]
+
+                    self.log.debug(
+                        termcolor.colored(
+                            'Number:\t{}\t'
+                            'Round:\t{}\t'
+                            'Fit:\t{}\n'.format(
+                                len(program_generation) + 1,
+                                gen_round + 1,
+                                fitness), color='green'))
+                if self.log.isEnabledFor(logging.INFO):
+                    self.log.info(utils.visualize_control_chars(g[:79]))
+
+                self.admit(program_generation, g)
+
+            # no need to fill the generation once it has a solution, which
+            # with dedup may be the only behaviour there is
+            if any(g.fitness() == 0 for g in program_generation):
+                break
 
         program_generation.sort(key=lambda x: x.fitness())
         return program_generation
@@ -91,27 +218,133 @@ class Evolve(object):
         worst = prev_gen[-1]
 
         next_gen = [x for x in prev_gen[:survivors]]
+        self.selector.build(prev_gen, lambda x: x.fitness())
+
+        clones = 0
+        solved = False
+        while len(next_gen) < self.per_gen and not solved:
+            # breed enough children to fill the generation, two per parent,
+            # then evaluate them all at once
+            children = []
+            missing = self.per_gen - len(next_gen)
+            with self._phase('select'):
+                parents = self.selector.sample(math.ceil(missing / 2))
+            with self._phase('mutate'):
+                for w1 in parents:
+                    w2 = Gene(self.trainer, self.donors.draw())
+
+                    children.extend(self.mutate(w1, w2))
+
+            # children that can't beat the worst of the last generation are
+            # stopped as soon as that is certain
+            with self._phase('evaluate'):
+                fitnesses = self.evaluator.evaluate(self.trainer, children,
+                                                    worst.fitness())
+            for child, fitness in zip(children, fitnesses):
+                if fitness < worst.fitness() and len(next_gen) < self.per_gen \
+                        and not solved:
+                    if self.admit(next_gen, child,
+                                  clones=clones >= self.clone_limit):
+                        clones = 0
+                    else:
+                        clones += 1
+                    solved = fitness == 0
+                else:
+                    self._rejected += 1
+
+        if solved:
+            # no need to fill the generation once it has a solution, which
+            # goes first
+            next_gen.sort(key=lambda x: x.fitness())
 
-        while len(next_gen) < self.per_gen:
-            w1 = utils.weighted_choice(prev_gen,
-                                       lambda x: x.fitness(),
-                                       inverse=True)
-            w2 = Gene(self.trainer, Gene.gen(350, 75))
+        if self.log.isEnabledFor(logging.DEBUG):
+            best = min(next_gen, key=lambda x: x.fitness())
+            self.log.debug('Best fitness: %s, was %s',
+                           best.fitness(),
+                           prev_gen[0].fitness())
+            self.log.debug(utils.visualize_control_chars(
+                best.output()[:len('Hello world!')]))
 
-            n1, n2 = self.mutate(w1, w2)
+        return next_gen
 
-            if n1.fitness() < worst.fitness():
-                next_gen.append(n1)
-            if n2.fitness() < worst.fitness():
-                next_gen.append(n2)
+    def represent(self, g: Gene) -> Gene:
+        """
+        The gene to admit in place of an evaluated one
 
-        self.log.debug('Best fitness: %s',
-                       next_gen[0].fitness(),
-                       prev_gen[0].fitness())
-        self.log.debug(utils.visualize_control_chars(
-            next_gen[0].output()[:len('Hello world!')]))
+        :param g: Gene to admit
+        :return: The shortest, then fastest, gene known to behave like `g` if
+            deduplicating, otherwise `g`
+        """
+        return g if self.behaviours is None else self.behaviours.add(g)
 
-        return next_gen
+    def admit(self,
+              generation: List[Gene],
+              g: Gene,
+              clones: bool = False) -> bool:
+        """
+        Add an evaluated gene to a generation, unless deduplicating and a
+        gene that behaves the same is in it already. That gene is swapped for
+        the better representative of the two.
+
+        The place of every behaviour in the generation is kept track of
+        between calls, so filling a generation takes a single pass over it.
+
+        :param generation: Generation to add the gene to
+        :param g: Gene to add
+        :param clones: Add the gene even if one that behaves the same is in
+            the generation already
+        :return: Whether the generation grew
+        """
+        g = self.represent(g)
+        if self.behaviours is not None:
+            fingerprint = BehaviourIndex.fingerprint(g)
+            places = self._places_in(generation)
+            n = places.get(fingerprint)
+            if n is not None and \
+                    BehaviourIndex.fingerprint(generation[n]) != fingerprint:
+                # reordered since, look again
+                self._building = None
+                places = self._places_in(generation)
+                n = places.get(fingerprint)
+            if n is not None and not clones:
+                if BehaviourIndex.rank(g) < BehaviourIndex.rank(generation[n]):
+                    generation[n] = g
+                return False
+            places.setdefault(fingerprint, len(generation))
+            self._built += 1
+        generation.append(g)
+        return True
+
+    def _places_in(self, generation: List[Gene]) -> Dict[Fingerprint, int]:
+        """
+        Place of the first gene with every behaviour in a generation, only
+        looked for again if the generation isn't the one last admitted to or
+        has changed size since
+        """
+        if generation is not self._building or \
+                len(generation) != self._built:
+            self._building = generation
+            self._built = len(generation)
+            self._places = {}
+            for n, other in enumerate(generation):
+                self._places.setdefault(BehaviourIndex.fingerprint(other), n)
+        return self._places
+
+    def immigrate(self,
+                  generation: List[Gene],
+                  codes: List[str]) -> List[Gene]:
+        """
+        Take in programs from another population, in place of the worst
+        genes of a generation if they do better
+
+        :param generation: Generation to add the programs to
+        :param codes: Brainfuck programs that come from elsewhere
+        :return: The generation, best first and no bigger than it was
+        """
+        immigrants = [Gene(self.trainer, code) for code in codes]
+        self.evaluator.evaluate(self.trainer, immigrants)
+        merged = sorted(generation + immigrants, key=lambda x: x.fitness())
+        return merged[:len(generation)]
 
     def mutate(self,
                g1: Gene,
@@ -119,174 +352,39 @@ class Evolve(object):
                mutation_odds: float = 0.03) -> Tuple[Gene, Gene]:
         """
         Mutate a given Brainfuck program in various ways
+
+        Every mutation keeps brackets balanced, so no mutated program has to
+        be repaired or thrown away and tried again.
+
         :param g1: the subject program to mutate
         :param g2: the donor program to mutate
         :param mutation_odds: probability of a mutation happening
         :return: Two mutated Brainfuck programs
         """
 
-        def __depth(code: str) -> int:
-            """
-            Depth (in number of `[` minus number of `]`) of code
-            :param code: String, code fragment to determine depth of
-            :return: Depth of brackets
-            """
-            d = 0
-            for i in code:
-                if i == '[':
-                    d += 1
-                elif i == ']':
-                    d -= 1
-            return d
-
-        def deletion(code: Gene) -> Gene:
-            """
-            Delete a section of the program
-
-            :param code: Code to delete a segment of
-            :return: Mutated code
-            """
-            c = 0
-            while True:
-                c += 1
-                average_mutation = mutation_odds * len(code)
-                X = random.gauss(average_mutation, average_mutation / 3)
-                x = int(abs(X))
-                pos = random.randint(0, len(code))
-
-                deleted = Gene.repair(code[:pos] + code[pos + x:])
-
-                g = Gene(self.trainer, deleted)
-
-                if g.fitness() != float('inf'):
-                    break
-
-            self.log.warning('Deletion took %s attempts', c)
-            return g
-
-        def duplication(code: Gene) -> Gene:
-            """
-            Duplicate a section of the program
-
-            :param code: Code to duplicate a segment of
-            :return: Mutated code
-            """
-            c = 0
-            while True:
-                c += 1
-                average_mutation = mutation_odds * len(code)
-                X = random.gauss(average_mutation, average_mutation * 2)
-                x = int(abs(X))
-                pos = random.randint(0, len(code))
-
-                if pos + x > len(code):
-                    continue
-
-                duplicated = Gene.repair(code[:pos + x]
-                                         + code[pos:pos + x]
-                                         + code[pos + x:])
-
-                new_code = Gene(self.trainer, duplicated)
-
-                if new_code.fitness() != float('inf'):
-                    break
-            self.log.warning('Deletion took %s attempts', c)
-
-            return new_code
-
-        def inversion(code: Gene) -> Gene:
-            """
-            Invert a section of the program
-            For example, abcdef -> aDCBef
-
-            :param code: Code to invert a portion of
-            :return: Mutated code
-            """
-            point = random.randint(0, len(code))
-            size = random.randint(0, len(code)) // 10
-
-            start = point
-            stop = point
-
-            s = code.gene
-
-            # This should probably avoid unbalanced brackets. I think.
-            while size > 0 and stop < len(s) and start >= 0:
-                if s[stop] in {']', '['}:
-                    if s[start] in {'[', ']'}:
-                        if s[start] != s[stop]:
-                            break
-                        else:
-                            start -= 1
-                            stop += 1
-                            size -= 2
-                    else:
-                        start -= 1
-                        size -= 1
-                else:
-                    stop += 1
-                    size -= 1
-
-            segment = s[start:stop][::-1]
-            code = s[:start] + segment[::-1] + s[stop:]
-            return Gene(self.trainer, Gene.repair(code))
-
-        def complementation(code: Gene) -> Gene:
-            """
-            Swap out code for it's complement
-            Ex. +/-, [/], >/<, ,/.
-
-            :param code: Code to complement a portion of
-            :return: Mutated code
-            """
-            raise NotImplementedError
-
-        def insertion(code1: Gene, code2: Gene) -> Tuple[Gene, Gene]:
-            """
-            Delete a section of program one and insert it into program two
-            :param code1: "Donor" segment of code
-            :param code2: "Receiver" segment of code
-            :return: Mutated donor and receiver code
-            """
-            raise NotImplementedError
-
-        def translocation(code1: Gene, code2: Gene) -> Tuple[Gene, Gene]:
-            """
-            Swap segments of code1 with code2
-
-            :param code1: First segment of code
-            :param code2: Second segment of code
-            :return: Both mutated segments of code
-            """
-            c = 0
-            while True:
-                c += 1
-                cut1 = random.randint(0, len(code1))
-                cut2 = random.randint(0, len(code2))
-
-                tmp = 0  # try finding nearby brackets to speed up code
-                d_needed = __depth(code2[cut2:])
-                while __depth(code1[cut1:]) != d_needed and tmp < 10:
-                    cut1 += 1
-                    tmp += 1
-
-                g1_out = Gene(self.trainer,
-                              Gene.repair(code1[cut1:] + code2[:cut2]))
-                g2_out = Gene(self.trainer,
-                              Gene.repair(code2[cut2:] + code1[:cut1]))
-
-                if g1_out.fitness() != float('inf') and \
-                        g2_out.fitness() != float('inf'):
-                    break
-
-            self.log.warning('Deletion took %s attempts', c)
-
-            return g1_out, g2_out
-
-        # Commented out for now as the above is really nonoptimal...
-        # TODO: Call the above mutations in varying amounts
-        # if random.getrandbits(1):
-        #     return translocation(g1, g2)
-        # else:
-        #     return deletion(g1), duplication(g2)
-        return inversion(g1), inversion(g2)
+        def size(code: Gene) -> int:
+            """Random segment length, proportional to the length of `code`"""
+            average_mutation = mutation_odds * len(code)
+            return int(abs(random.gauss(average_mutation,
+                                        average_mutation / 3)))
+
+        def single(code: Gene) -> Gene:
+            """Mutate a program on its own"""
+            operator = random.choice((mutation.deletion,
+                                      mutation.duplication,
+                                      mutation.inversion,
+                                      mutation.complementation))
+            mutated, edit = operator(code.brackets, size(code))
+            return Gene(self.trainer, mutated, code, edit)
+
+        if random.getrandbits(1):
+            return single(g1), single(g2)
+
+        if random.getrandbits(1):
+            (m1, e1), (m2, e2) = mutation.translocation(g1.brackets,
+                                                        g2.brackets)
+        else:
+            (m1, e1), (m2, e2) = mutation.insertion(g1.brackets,
+                                                    g2.brackets,
+                                                    size(g1))
+        return Gene(self.trainer, m1, g1, e1), Gene(self.trainer, m2, g2, e2)
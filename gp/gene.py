@@ -1,25 +1,69 @@
 from __future__ import annotations
 
+import itertools
 import logging
+import os
 import random
-from typing import Optional, Tuple, Union
+from typing import Optional, Sequence, Type, Union
 
-from gp.brainfuck_machine import BrainfuckEmulator
+from gp import metrics
+from gp.analysis import HANGS, UNKNOWN, Analysis, analyze
+from gp.brainfuck_machine import Snapshot
+from gp.cache import FitnessCache, Result
+from gp.compiler import CompiledEmulator
+from gp.mutation import BracketIndex
 from gp.trainer import Trainer
 
 
+# commands `Gene.gen` picks from, all equally likely
+COMMANDS = ('>', '<', '+', '-', '.', ',', '[', ']')
+
+
 class Gene(object):
-    """Representation of a `Gene` and all the relevant data surrounding it"""
+    """
+    Representation of a `Gene` and all the relevant data surrounding it
+
+    Populations hold a lot of genes, so attributes live in slots rather than
+    a dict per gene. The program itself is an ASCII `str`, which CPython
+    already stores at one byte per command.
+    """
+    __slots__ = ('gene', 'snapshots', '__trainer', '__output', '__fitness',
+                 '__cycles', '__bound', '__brackets', '__index')
     log = logging.getLogger(__name__)
-    __output = None
-    __fitness = None
+
+    # results shared by every gene, so regenerated programs aren't rerun
+    cache: Optional[FitnessCache] = FitnessCache()
+
+    # emulator genes are run on, see `gp.profiling.Profiler`
+    engine: Type[CompiledEmulator] = CompiledEmulator
 
     def __init__(self,
                  trainer: Trainer,
-                 gene: str) -> None:
-        """Load data we need"""
+                 gene: str,
+                 parent: Optional[Gene] = None,
+                 edit: Optional[int] = None) -> None:
+        """
+        Load data we need
+
+        :param parent: Gene this one was mutated from. Running this gene
+            picks up from the last snapshot the parent took before `edit`.
+        :param edit: Position of the first change made to the parent,
+            defaults to the end of the code they have in common
+        """
         self.__trainer = trainer
         self.gene = gene
+        self.__output: Optional[str] = None
+        self.__fitness: Optional[Union[int, float]] = None
+        self.__cycles: Optional[int] = None
+        self.__bound: Union[int, float] = 0
+        self.__brackets: Optional[BracketIndex] = None
+
+        # snapshots of running the gene, see `CompiledEmulator`
+        self.snapshots: Sequence[Snapshot] = ()
+        if parent is not None:
+            prefix = len(os.path.commonprefix([parent.gene, gene]))
+            edit = prefix if edit is None else min(edit, prefix)
+            self.snapshots = [s for s in parent.snapshots if s.pptr <= edit]
 
     def __iter__(self):
         """Allow iterating through the gene string"""
@@ -45,94 +89,191 @@ class Gene(object):
         """We store this function as a property, and cache the value of it"""
         return len(self.gene)
 
-    def fitness(self) -> Union[int, float]:
-        """The fitness of the particular gene as a property, cached"""
-        if self.__fitness is None:
-            self.__fitness = self.__trainer.check_fitness(self.output())
+    @property
+    def brackets(self) -> BracketIndex:
+        """Bracket structure of the gene, built on first use"""
+        if self.__brackets is None:
+            self.__brackets = BracketIndex(self.gene)
+        return self.__brackets
+
+    @property
+    def evaluated(self) -> bool:
+        """Whether the fitness of the gene is already known"""
+        return self.__fitness is not None
+
+    @property
+    def cycles(self) -> Optional[int]:
+        """Cycles the gene ran for, if it has been run here"""
+        return self.__cycles
+
+    def lookup(self) -> bool:
+        """
+        Load the results of the gene from the shared cache, if there
+
+        :return: Whether the fitness of the gene is now known
+        """
+        if self.__fitness is None and self.cache is not None:
+            result = self.cache.get(self.__trainer, self.gene)
+            if result is not None:
+                self.__output, self.__fitness, self.__cycles = result
+        return self.__fitness is not None
+
+    def load(self,
+             output: str,
+             fitness: Union[int, float],
+             cycles: Optional[int] = None,
+             share: bool = True) -> None:
+        """
+        Cache the results of running the gene somewhere else, e.g. in a
+        worker process
+
+        :param output: What the program wrote to output
+        :param fitness: Fitness the trainer gave that output
+        :param cycles: Cycles the program ran for
+        :param share: Whether to put the results in the shared cache too,
+            only for those of running the program as far as `max_iter`
+        """
+        self.__output = output
+        self.__fitness = fitness
+        self.__cycles = cycles
+        if share and self.cache is not None:
+            self.cache.put(self.__trainer, self.gene,
+                           (output, fitness, cycles))
+
+    def reject(self, bound: Union[int, float]) -> None:
+        """
+        Record that the gene was stopped early, somewhere else, once its
+        fitness was known to be at least `bound`
+
+        :param bound: Lower bound on the fitness
+        """
+        self.__bound = max(self.__bound, bound)
+
+    @property
+    def bound(self) -> Union[int, float]:
+        """Best known lower bound on the fitness, exact once evaluated"""
+        return self.__bound if self.__fitness is None else self.__fitness
+
+    def fitness(self,
+                threshold: Optional[Union[int, float]] = None) \
+            -> Union[int, float]:
+        """
+        The fitness of the particular gene as a property, cached
+
+        :param threshold: Fitness at which the gene is of no use, e.g. that of
+            the worst gene in a generation. The gene is stopped as soon as its
+            fitness is known to be at least this.
+        :return: The fitness, or a lower bound of at least `threshold` on it
+            if the gene was stopped early
+        """
+        if self.lookup():
+            return self.__fitness
+        if threshold is not None and self.__bound >= threshold:
+            return self.__bound
+
+        fitness = self.run(threshold)
+        if fitness is None:
+            return self.__bound
+        self.load(self.__output, fitness, self.__cycles)
         return self.__fitness
 
-    async def output(self, max_iter: int = 100_000) -> str:
+    def output(self, max_iter: int = 100_000) -> str:
         """
-        The output of running the gene with a particular input
+        The output of running the gene with a particular input, that of the
+        trainer's first case if it has many
+
+        The program is stopped as soon as it has produced all the output the
+        trainer is going to look at.
 
         :param max_iter: Maximum iterations the can program
         :return: What the program wrote to output
         """
         # cache results of emulator
         if self.__output is None:
-            self.__output = BrainfuckEmulator(self.gene,
-                                              self.__trainer.gen_in(),
-                                              max_iter).run()
+            self.run(max_iter=max_iter)
         return self.__output
 
+    def run(self,
+            threshold: Optional[Union[int, float]] = None,
+            max_iter: int = 100_000) -> Optional[Union[int, float]]:
+        """
+        Run the gene on every case of the trainer, without looking in the
+        shared cache
+
+        :param threshold: Stop the program once its fitness is known to be at
+            least this, without running the cases after that
+        :param max_iter: Maximum iterations the can program, per case
+        :return: The fitness of the program, or None if it was stopped
+            because of `threshold`
+        """
+        cases = self.__trainer.cases()
+        if not cases:
+            raise ValueError('Trainer has no cases to run the gene on')
+        fitness = 0
+        cycles: Optional[int] = 0
+        for n, case in enumerate(cases):
+            remaining = None if threshold is None else threshold - fitness
+            run = CaseRun(self, case, max_iter, resume=not n)
+            run.advance(remaining)
+            output, case_fitness, case_cycles = run.result()
+            fitness += case_fitness
+            if cycles is not None and case_cycles is not None:
+                cycles += case_cycles
+            else:
+                cycles = None
+            if not n and output is not None:
+                self.__output = output
+
+            if output is None or (threshold is not None and
+                                  fitness >= threshold and
+                                  n + 1 < len(cases)):
+                self.__trainer.stopped_at(case)
+                self.__cycles = cycles
+                self.reject(fitness)
+                return None
+
+        self.__cycles = cycles
+        return fitness
+
     @staticmethod
     def gen(mu: Optional[float] = None,
             sigma: Optional[float] = None,
-            length: Optional[int] = None) -> Union[Tuple[str, int], str]:
+            length: Optional[int] = None) -> str:
         """
         Generate a random Brainfuck program
 
-        :param length:
+        Commands are picked uniformly, a `[` opens a loop that is closed by
+        a later `]` or at the end. Opening a nested loop takes up two places
+        of `length`, and a `]` outside of any loop takes up one place while
+        adding nothing.
+
+        :param length: Number of places, defaults to a normal distribution
         :param mu: Average program length
         :param sigma: Standard deviation of program length
         :return:  String containing a valid Brainfuck program
         """
-        commands = (
-            (2, '>'),
-            (2, '<'),
-            (2, '+'),
-            (2, '-'),
-            (2, '.'),
-            (2, ','),
-            (1, '['),
-            (1, ']'),
-        )
         if not length:
             length = int(random.gauss(mu, sigma))
 
-        code = ''
-
-        # make a program to length
-        while length > 0:
-            c = random.choice(commands)
-
-            # recursively create balanced brackets
-            if c[1] == '[':
-                inner, length = Gene.__inner_gen(length - 1)
-                code += '[{}]'.format(inner)
-            elif c[1] == ']':
-                length -= 1
-            else:
-                code += c[1]
-                length -= 1
-        else:
-            return code
-
-    @staticmethod
-    def __inner_gen(length: int) -> Tuple[str, int]:
-        commands = (
-            (2, '>'),
-            (2, '<'),
-            (2, '+'),
-            (2, '-'),
-            (2, '.'),
-            (2, ','),
-            (1, '['),
-            (1, ']'),
-        )
-        code = ''
+        code = []
+        depth = 0
         while length > 0:
-            c = random.choice(commands)
-            if c[1] == '[':
-                inner, length = Gene.__inner_gen(length - 2)
-                code += '[{}]'.format(inner)
-            elif c[1] == ']':
-                return code, length
+            c = random.choice(COMMANDS)
+            if c == '[':
+                code.append(c)
+                length -= 2 if depth else 1
+                depth += 1
+            elif c == ']':
+                if depth:
+                    code.append(c)
+                    depth -= 1
+                else:
+                    length -= 1
             else:
-                code += c[1]
+                code.append(c)
                 length -= 1
-        else:
-            return code, length
+        code.append(']' * depth)
+        return ''.join(code)
 
     @staticmethod
     def repair(code: str) -> str:
@@ -142,22 +283,138 @@ class Gene(object):
         :param code: String containing an invalid Brainfuck program
         :return:  String containing a valid Brainfuck program
         """
+        kept = []
         stack_counter = 0
-        s = ''
-
         for i in code:
             if i == '[':
                 stack_counter += 1
-                s += i
             elif i == ']':
                 # handle too many right brackets
-                if stack_counter:
-                    s += i
-                    stack_counter -= 1
-            else:
-                s += i
+                if not stack_counter:
+                    continue
+                stack_counter -= 1
+            kept.append(i)
         # handle too many left brackets
-        while stack_counter:
-            s += ']'
-            stack_counter -= 1
-        return s
+        kept.append(']' * stack_counter)
+        return ''.join(kept)
+
+
+class CaseRun(object):
+    """
+    Run of a gene on a single case, that can be paused once it has used up a
+    budget of cycles and resumed later with a bigger one
+    """
+
+    # whether to work out the output of simple genes before running them,
+    # see `gp.analysis`
+    prepass: bool = True
+
+    def __init__(self,
+                 gene: Gene,
+                 case: Trainer,
+                 max_iter: int,
+                 resume: bool) -> None:
+        """
+        :param gene: Gene to run
+        :param case: Single case trainer
+        :param max_iter: Maximum iterations the program can run
+        :param resume: Whether to pick up from, and take, the gene's
+            snapshots. They only hold for a single input, that of the first
+            case.
+        """
+        self.case = case
+        self.max_iter = max_iter
+        self.length = case.output_length()
+        self.output = ''  # as far as the program has got
+        self.cycles: Optional[int] = 0
+        self.bound: Optional[Union[int, float]] = None  # set once stopped
+        self.done = False
+        self.emulator: Optional[CompiledEmulator] = None
+
+        # no need to run programs whose output is clear from the code alone
+        analysis = Analysis(UNKNOWN)
+        if self.prepass:
+            analysis = analyze(gene.gene, case.gen_in(), max_iter)
+        if analysis.kind != UNKNOWN:
+            if analysis.kind == HANGS:
+                metrics.events[metrics.INFINITE_LOOPS] += 1
+            self.output = analysis.output[:self.length]
+            self.cycles = None
+            self.done = True
+            return
+
+        # carry on from wherever the analysis, or the parent, got furthest
+        emulator = gene.engine(gene.gene, case.gen_in(), max_iter)
+        start = analysis.snapshot
+        if resume:
+            # snapshots only hold for the input they were taken on, and the
+            # first case changes whenever the trainer reorders its cases
+            snapshots = [s for s in gene.snapshots
+                         if s.input_string == emulator.input_string]
+            if snapshots and snapshots[-1].cycles <= max_iter and \
+                    (start is None or snapshots[-1].cycles > start.cycles):
+                start = snapshots[-1]
+            emulator.snapshots = gene.snapshots = snapshots
+        if start is not None:
+            emulator.restore(start)
+        self.emulator = emulator
+
+    def advance(self,
+                threshold: Optional[Union[int, float]] = None,
+                budget: Optional[int] = None) -> None:
+        """
+        Run the program until it is done with the case or has used `budget`
+        cycles
+
+        :param threshold: Stop the program once its fitness on the case is
+            known to be at least this
+        :param budget: Cycles the program may have used by the end, the run
+            is done once this reaches `max_iter`
+        """
+        if self.done:
+            return
+        emulator = self.emulator
+        limit = self.max_iter if budget is None \
+            else min(budget, self.max_iter)
+        if limit != emulator.max_iter:
+            emulator.limit(limit)
+
+        # only the output still to come is streamed
+        remaining = None if self.length is None \
+            else max(self.length - len(emulator.out), 0)
+        if threshold is None:
+            if remaining is None:
+                emulator.run()
+            else:
+                for _ in itertools.islice(emulator.stream(), remaining):
+                    pass
+        else:
+            scorer = self.case.scorer()
+            for c in itertools.chain(emulator.out,
+                                     itertools.islice(emulator.stream(),
+                                                      remaining)):
+                scorer.feed(c)
+                if scorer.bound() >= threshold:
+                    self.cycles = emulator.cycles
+                    self.bound = scorer.bound()
+                    self.done = True
+                    self.emulator = None
+                    return
+        self.output = emulator.out
+        self.cycles = emulator.cycles
+
+        finished = emulator.state.pptr >= emulator.code_len or \
+            (self.length is not None and len(emulator.out) >= self.length)
+        if finished or limit == self.max_iter:
+            metrics.count_run(emulator)
+            self.done = True
+            self.emulator = None
+
+    def result(self) -> Result:
+        """
+        Output, fitness and cycles of the program as far as it has got, no
+        output and a lower bound on the fitness if it was stopped early
+        """
+        if self.bound is not None:
+            return None, self.bound, self.cycles
+        return self.output, self.case.check_fitness(self.output), self.cycles
@@ -0,0 +1,79 @@
+import logging
+import random
+from typing import List
+
+import numpy as np
+
+from gp.gene import COMMANDS
+
+# ASCII codes of the commands, drawn uniformly like `Gene.gen` does
+OPCODES = np.frombuffer(''.join(COMMANDS).encode('ascii'), dtype=np.uint8)
+OPEN, CLOSE = ord('['), ord(']')
+
+
+def generate(k: int, mu: float, sigma: float) -> List[str]:
+    """
+    Generate a batch of random Brainfuck programs at once
+
+    Every place of a program is a command drawn uniformly, like `Gene.gen`,
+    and brackets are balanced the way `Gene.repair` does it: a `]` outside
+    of any loop is dropped, and loops still open at the end are closed. The
+    draws come from NumPy, seeded from `random` so that seeding `random`
+    still makes a run repeatable.
+
+    :param k: Number of programs
+    :param mu: Average program length
+    :param sigma: Standard deviation of program length
+    :return: Strings containing valid Brainfuck programs
+    """
+    rng = np.random.default_rng(random.getrandbits(64))
+    lengths = np.maximum(rng.normal(mu, sigma, k).astype(np.int64), 0)
+    width = int(lengths.max(initial=0))
+    if not width:
+        return [''] * k
+    codes = OPCODES[rng.integers(len(OPCODES), size=(k, width))]
+    codes[np.arange(width) >= lengths[:, None]] = 0
+
+    # depth after every place, and the lowest it has been so far. A `]` is
+    # outside of any loop exactly when it takes the depth to a new low.
+    delta = (codes == OPEN).astype(np.int16) - (codes == CLOSE)
+    depth = np.cumsum(delta, axis=1)
+    lowest = np.minimum.accumulate(np.minimum(depth, 0), axis=1)
+    before = np.zeros_like(lowest)
+    before[:, 1:] = lowest[:, :-1]
+    keep = (codes != 0) & ~((codes == CLOSE) & (depth < before))
+    still_open = depth[:, -1] - lowest[:, -1]
+
+    return [codes[n][keep[n]].tobytes().decode('ascii') + ']' * int(o)
+            for n, o in enumerate(still_open)]
+
+
+class DonorPool(object):
+    """
+    Supply of random programs, generated in bulk ahead of being needed
+
+    `Evolve` wants a fresh random program for every child it breeds, which
+    is much cheaper to generate a few hundred at a time.
+    """
+    log = logging.getLogger(__name__)
+
+    def __init__(self,
+                 mu: float = 350,
+                 sigma: float = 75,
+                 batch: int = 256) -> None:
+        """
+        :param mu: Average program length
+        :param sigma: Standard deviation of program length
+        :param batch: Number of programs to generate at a time
+        """
+        self.mu = mu
+        self.sigma = sigma
+        self.batch = batch
+        self._programs: List[str] = []
+
+    def draw(self) -> str:
+        """Take a random program out of the pool, refilling it if empty"""
+        if not self._programs:
+            self.log.debug('Generating %s programs', self.batch)
+            self._programs = generate(self.batch, self.mu, self.sigma)
+        return self._programs.pop()
@@ -0,0 +1,130 @@
+import logging
+import multiprocessing
+import multiprocessing.queues
+import multiprocessing.synchronize
+import os
+import queue
+import random
+
+from gp.evolve import Evolve
+from gp.trainer import Trainer
+
+
+def island(index: int,
+           trainer: Trainer,
+           genes_per_gen: int,
+           interval: int,
+           migrants: int,
+           inbox: multiprocessing.queues.Queue,
+           outbox: multiprocessing.queues.Queue,
+           solved: multiprocessing.synchronize.Event,
+           solutions: multiprocessing.queues.Queue,
+           seed: int) -> None:
+    """
+    Evolve the population of a single island, kept at module level so it
+    can be the target of a process
+
+    Every `interval` generations the best `migrants` programs are sent to
+    the next island, and whatever has arrived from the previous island is
+    taken in without waiting for it.
+
+    :param index: Number of the island
+    :param trainer: Trainer to evolve a program for
+    :param genes_per_gen: Number of genes in the population
+    :param interval: Generations between migrations
+    :param migrants: Number of programs sent in each migration
+    :param inbox: Programs sent by the previous island
+    :param outbox: Programs to send to the next island
+    :param solved: Set once any island has found a solution
+    :param solutions: Where to put the solution, with the island's number
+    :param seed: Seed for `random`, so islands don't all evolve the same
+    """
+    random.seed(seed)
+    log = logging.getLogger(__name__)
+    evolve = Evolve(trainer, genes_per_gen)
+
+    generation = evolve.generation_zero()
+    counter = 0
+    while generation[0].fitness() != 0 and not solved.is_set():
+        generation = evolve.offspring(generation)
+        generation.sort(key=lambda x: x.fitness())
+
+        counter += 1
+        if counter % interval == 0:
+            outbox.put([g.gene for g in generation[:migrants]])
+        try:
+            while True:
+                generation = evolve.immigrate(generation, inbox.get_nowait())
+        except queue.Empty:
+            pass
+        log.debug('[Island #%s]\t[Gen #%s]\tBest fitness: %s',
+                  index, counter, generation[0].fitness())
+
+    if generation[0].fitness() == 0:
+        solved.set()
+        solutions.put((index, generation[0].gene))
+
+
+class Islands(object):
+    """
+    Island model: independent populations, each evolved in its own process
+
+    The islands are arranged in a ring, each sending its best programs on to
+    the next one every few generations. Apart from that they don't wait on
+    each other, and all of them are stopped as soon as one finds a solution.
+    """
+    log = logging.getLogger(__name__)
+
+    def __init__(self,
+                 trainer: Trainer,
+                 islands: int = 0,
+                 genes_per_gen: int = 24,
+                 interval: int = 5,
+                 migrants: int = 2) -> None:
+        """
+        :param trainer: Trainer to evolve a program for
+        :param islands: Number of islands, 0 for one per core
+        :param genes_per_gen: Number of genes on every island
+        :param interval: Generations between migrations
+        :param migrants: Number of programs sent in each migration
+        """
+        self.trainer = trainer
+        self.islands = islands or os.cpu_count() or 1
+        self.per_gen = genes_per_gen
+        self.interval = interval
+        self.migrants = migrants
+
+    def generate_solution(self) -> str:
+        """Create a genetic program that solves the defined problem"""
+        solved = multiprocessing.Event()
+        solutions = multiprocessing.Queue()
+        inboxes = [multiprocessing.Queue() for _ in range(self.islands)]
+        processes = [
+            multiprocessing.Process(
+                target=island,
+                args=(n, self.trainer, self.per_gen, self.interval,
+                      self.migrants, inboxes[n],
+                      inboxes[(n + 1) % self.islands], solved, solutions,
+                      random.getrandbits(64)),
+                daemon=True)
+            for n in range(self.islands)]
+
+        for process in processes:
+            process.start()
+        try:
+            while any(p.is_alive() for p in processes) \
+                    or not solutions.empty():
+                try:
+                    index, code = solutions.get(timeout=1)
+                except queue.Empty:
+                    continue
+                self.log.info('Island #%s found a solution', index)
+                return code
+            raise RuntimeError('Every island stopped without a solution')
+        finally:
+            # the other islands may be in the middle of a generation, and
+            # have nothing worth waiting for
+            solved.set()
+            for process in processes:
+                process.terminate()
+                process.join()
@@ -0,0 +1,103 @@
+import collections
+import json
+from typing import Callable, NamedTuple, Optional, TextIO, Union
+
+from gp.brainfuck_machine import BrainfuckEmulator
+
+# how runs of genes ended early, counted in this process
+TIMEOUTS = 'timeouts'  # out of cycles
+INFINITE_LOOPS = 'infinite_loops'  # stuck in a loop that was spotted
+events: collections.Counter = collections.Counter()
+
+
+def count_run(emulator: BrainfuckEmulator) -> None:
+    """
+    Count a finished run of an emulator in `events`, if it was cut off
+
+    :param emulator: Emulator that is done running
+    """
+    if emulator.cycles > emulator.max_iter:
+        if emulator.in_infinite_loop:
+            events[INFINITE_LOOPS] += 1
+        else:
+            events[TIMEOUTS] += 1
+
+
+class GenerationRecord(NamedTuple):
+    """What it took to make a generation, and how good it is"""
+    generation: int
+    evaluations: int  # genes run, rather than found in the cache
+    cycles: int  # cycles run by those genes, where known
+    timeouts: int
+    infinite_loops: int
+    rejected: int  # genes made but kept out of the generation
+    cache_hits: int
+    select_time: float  # seconds spent picking parents
+    mutate_time: float  # seconds spent making children, or random genes
+    evaluate_time: float  # seconds spent waiting on the evaluator
+    wall_time: float  # seconds spent on the generation in all
+    best: Union[int, float]
+    median: Union[int, float]
+    # only filled in for sinks that want details
+    best_gene: Optional[str] = None
+    best_output: Optional[str] = None
+
+
+class Sink(object):
+    """
+    Takes the record of every generation `Evolve` makes
+
+    If any sink wants `details`, records come with the best gene and its
+    output, which are otherwise left out to save formatting them.
+    """
+    details = False
+
+    def record(self, record: GenerationRecord) -> None:
+        """Take the record of a generation"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release anything held by the sink, once evolution is over"""
+        pass
+
+
+class CallbackSink(Sink):
+    """Hands every record to a function"""
+
+    def __init__(self,
+                 callback: Callable[[GenerationRecord], None],
+                 details: bool = False) -> None:
+        """
+        :param callback: Function to call with every record
+        :param details: Whether records should come with the best gene
+        """
+        self.callback = callback
+        self.details = details
+
+    def record(self, record):
+        self.callback(record)
+
+
+class JsonLinesSink(Sink):
+    """Writes every record to a file, as a JSON object per line"""
+
+    def __init__(self,
+                 file: Union[str, TextIO],
+                 details: bool = False) -> None:
+        """
+        :param file: Path of a file to append to, or a file to write to
+        :param details: Whether records should come with the best gene
+        """
+        self._owned = isinstance(file, str)
+        self.file: TextIO = open(file, 'a') if isinstance(file, str) \
+            else file
+        self.details = details
+
+    def record(self, record):
+        json.dump(record._asdict(), self.file)
+        self.file.write('\n')
+        self.file.flush()
+
+    def close(self):
+        if self._owned:
+            self.file.close()
@@ -0,0 +1,169 @@
+import random
+from typing import Dict, List, Tuple
+
+from gp.brainfuck_machine import BrainfuckEmulator
+
+# commands swapped by `complementation`
+COMPLEMENTS = str.maketrans('+-<>,.', '-+><.,')
+
+# reversing code turns `[...]` into `]...[`, so brackets are swapped back
+REVERSED_BRACKETS = str.maketrans('[]', '][')
+
+
+class BracketIndex(object):
+    """
+    Bracket structure of a valid program, used to pick cut points that keep
+    the program valid without having to repair it afterwards
+    """
+
+    def __init__(self, code: str) -> None:
+        """
+        :param code: A valid Brainfuck program
+        """
+        self.code = code
+
+        # location of every bracket's match
+        self.match: Dict[int, int] = BrainfuckEmulator._loop_map(code)
+
+        # number of loops open before each position, and the positions by
+        # that depth, the end of the code included
+        self.depth: List[int] = [0] * (len(code) + 1)
+        self.at_depth: Dict[int, List[int]] = {0: [0]}
+        d = 0
+        for n, c in enumerate(code, 1):
+            d += (c == '[') - (c == ']')
+            self.depth[n] = d
+            self.at_depth.setdefault(d, []).append(n)
+
+    def segment(self, size: int) -> Tuple[int, int]:
+        """
+        Pick a random stretch of code that is valid on its own
+
+        The stretch starts at a random position and takes in whole loops
+        until it would be longer than `size` or leave the loop it started in.
+
+        :param size: Maximum length of the stretch
+        :return: Start and end of the stretch
+        """
+        code = self.code
+        start = end = random.randint(0, len(code))
+        limit = min(start + size, len(code))
+        while end < limit and code[end] != ']':
+            if code[end] == '[':
+                if self.match[end] >= limit:
+                    break
+                end = self.match[end]
+            end += 1
+        return start, end
+
+    def cut(self, depth: int) -> int:
+        """
+        Pick a random position at the given depth
+
+        :param depth: Number of loops open before the position
+        :return: A position, or -1 if no position is that deep
+        """
+        positions = self.at_depth.get(depth)
+        return random.choice(positions) if positions else -1
+
+
+# Every operator takes valid programs and returns valid programs, each with
+# the position of the first change made to it.
+
+def deletion(index: BracketIndex, size: int) -> Tuple[str, int]:
+    """
+    Delete a section of the program
+
+    :param index: Index of the code to delete a segment of
+    :param size: Maximum length of the segment
+    :return: Mutated code and where it was changed
+    """
+    start, end = index.segment(size)
+    return index.code[:start] + index.code[end:], start
+
+
+def duplication(index: BracketIndex, size: int) -> Tuple[str, int]:
+    """
+    Duplicate a section of the program, right after itself
+
+    :param index: Index of the code to duplicate a segment of
+    :param size: Maximum length of the segment
+    :return: Mutated code and where it was changed
+    """
+    start, end = index.segment(size)
+    code = index.code
+    return code[:end] + code[start:end] + code[end:], end
+
+
+def inversion(index: BracketIndex, size: int) -> Tuple[str, int]:
+    """
+    Invert a section of the program
+    For example, +[>.]- -> [.>]+-, with loops kept the right way around
+
+    :param index: Index of the code to invert a segment of
+    :param size: Maximum length of the segment
+    :return: Mutated code and where it was changed
+    """
+    start, end = index.segment(size)
+    code = index.code
+    segment = code[start:end][::-1].translate(REVERSED_BRACKETS)
+    return code[:start] + segment + code[end:], start
+
+
+def complementation(index: BracketIndex, size: int) -> Tuple[str, int]:
+    """
+    Swap out a section of code for its complement
+    Ex. +/-, >/<, ,/. while brackets are left alone
+
+    :param index: Index of the code to complement a segment of
+    :param size: Maximum length of the segment
+    :return: Mutated code and where it was changed
+    """
+    start, end = index.segment(size)
+    code = index.code
+    segment = code[start:end].translate(COMPLEMENTS)
+    return code[:start] + segment + code[end:], start
+
+
+def insertion(donor: BracketIndex,
+              receiver: BracketIndex,
+              size: int) -> Tuple[Tuple[str, int], Tuple[str, int]]:
+    """
+    Delete a section of program one and insert it into program two
+
+    A valid segment keeps any program valid, wherever it is inserted.
+
+    :param donor: Index of the code to take a segment from
+    :param receiver: Index of the code to insert the segment into
+    :param size: Maximum length of the segment
+    :return: Mutated donor and receiver code, with where they were changed
+    """
+    start, end = donor.segment(size)
+    pos = random.randint(0, len(receiver.code))
+    segment = donor.code[start:end]
+    return ((donor.code[:start] + donor.code[end:], start),
+            (receiver.code[:pos] + segment + receiver.code[pos:], pos))
+
+
+def translocation(index1: BracketIndex,
+                  index2: BracketIndex) -> Tuple[Tuple[str, int],
+                                                 Tuple[str, int]]:
+    """
+    Swap the tails of two programs, cut at the same depth
+
+    The head of each program leaves as many loops open as the tail of the
+    other one closes, so both children are valid.
+
+    :param index1: Index of the first program
+    :param index2: Index of the second program
+    :return: Both mutated programs, with where they were changed
+    """
+    cut1 = random.randint(0, len(index1.code))
+    cut2 = index2.cut(index1.depth[cut1])
+    if cut2 < 0:
+        # the second program isn't that deep, so cut both at the top level
+        cut1, cut2 = index1.cut(0), index2.cut(0)
+
+    code1, code2 = index1.code, index2.code
+    return ((code1[:cut1] + code2[cut2:], cut1),
+            (code2[:cut2] + code1[cut1:], cut2))
@@ -0,0 +1,166 @@
+import asyncio
+import concurrent.futures
+from typing import List, Optional
+
+from gp.evaluate import Evaluator
+from gp.evolve import Evolve
+from gp.gene import Gene
+from gp.selection import Selector
+from gp.trainer import Trainer
+
+
+class PipelineEvolve(Evolve):
+    """
+    Evolves programs like `Evolve`, breeding children while others are
+    being evaluated
+
+    A producer task keeps selecting parents and mutating them into a bounded
+    queue of candidates. Consumer tasks take whatever candidates are ready
+    and evaluate them on a thread pool, so that the event loop is free to
+    breed more in the meantime, and admit children into the next generation
+    as soon as their results are back.
+
+    Breeding and evaluating only truly overlap when the evaluator runs genes
+    outside of the interpreter's lock, e.g. in worker processes. Consumers
+    wait on the evaluator at the same time, so the evaluate time in records
+    of generations can add up to more than their wall time.
+
+    The thread pool consumers wait on lasts as long as the `PipelineEvolve`,
+    so a generation is over as soon as it is full, rather than once the
+    evaluations still going on for children there is no room for are done.
+    """
+
+    def __init__(self,
+                 trainer: Trainer,
+                 genes_per_gen: int = 24,
+                 workers: int = 1,
+                 evaluator: Optional[Evaluator] = None,
+                 selector: Optional[Selector] = None,
+                 consumers: int = 2,
+                 queue_size: Optional[int] = None,
+                 dedup: bool = False) -> None:
+        """
+        :param consumers: Number of batches of candidates being evaluated at
+            any time
+        :param queue_size: Number of candidates bred ahead of being
+            evaluated, by default a generation's worth
+        """
+        super().__init__(trainer, genes_per_gen, workers, evaluator, selector,
+                         dedup)
+        self.consumers = consumers
+        self.queue_size = queue_size or genes_per_gen
+        self._executor: Optional[concurrent.futures.Executor] = None
+
+    def generate_solution(self) -> str:
+        try:
+            return super().generate_solution()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Let go of the threads evaluations are waited on in"""
+        if self._executor is not None:
+            # whatever is still running was thrown away already
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def offspring(self,
+                  prev_gen: List[Gene],
+                  survivors: int = 2) -> List[Gene]:
+        return asyncio.run(self.offspring_async(prev_gen, survivors))
+
+    async def offspring_async(self,
+                              prev_gen: List[Gene],
+                              survivors: int = 2) -> List[Gene]:
+        """
+        Generate offspring for a given generation, breeding and evaluating
+        children at the same time
+
+        :param prev_gen: Program generation
+        :param survivors: Number of Genes to take into the next round
+        :return: Next generation
+        """
+        prev_gen.sort(key=lambda x: x.fitness())
+        worst = prev_gen[-1].fitness()
+
+        next_gen = [x for x in prev_gen[:survivors]]
+        self.selector.build(prev_gen, lambda x: x.fitness())
+        candidates: asyncio.Queue = asyncio.Queue(self.queue_size)
+        full = asyncio.Event()
+        clones = 0  # in a row, see `Evolve.clone_limit`
+        solved = False
+
+        async def produce() -> None:
+            """Breed children until the generation is full"""
+            while True:
+                with self._phase('select'):
+                    w1 = self.selector.choice()
+                with self._phase('mutate'):
+                    w2 = Gene(self.trainer, self.donors.draw())
+                    children = self.mutate(w1, w2)
+                for child in children:
+                    await candidates.put(child)
+
+        async def consume(executor: concurrent.futures.Executor) -> None:
+            """Evaluate whatever children are ready, until it is full"""
+            nonlocal clones, solved
+            while not full.is_set():
+                children = [await candidates.get()]
+                while not candidates.empty():
+                    children.append(candidates.get_nowait())
+                if full.is_set():
+                    # filled by another consumer while waiting on children
+                    return
+
+                # children that can't beat the worst of the last generation
+                # are stopped as soon as that is certain
+                with self._phase('evaluate'):
+                    fitnesses = await self.evaluator.evaluate_async(
+                        self.trainer, children, worst, executor)
+                if full.is_set():
+                    # filled while these were being evaluated, none fit
+                    return
+                for child, fitness in zip(children, fitnesses):
+                    if fitness < worst and len(next_gen) < self.per_gen \
+                            and not solved:
+                        if self.admit(next_gen, child,
+                                      clones=clones >= self.clone_limit):
+                            clones = 0
+                        else:
+                            clones += 1
+                        solved = fitness == 0
+                    else:
+                        self._rejected += 1
+                if len(next_gen) >= self.per_gen or solved:
+                    full.set()
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self.consumers)
+        tasks = [asyncio.ensure_future(full.wait()),
+                 asyncio.ensure_future(produce()),
+                 *(asyncio.ensure_future(consume(self._executor))
+                   for _ in range(self.consumers))]
+        try:
+            done, _ = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_COMPLETED)
+            # breeding never stops on its own, and consumers only once the
+            # generation is full, so raise whatever went wrong
+            for task in done:
+                task.result()
+        finally:
+            # consumers still waiting on children, or on the evaluator, would
+            # only evaluate children there is no room for. Evaluations that
+            # already started finish in the background, and are dropped.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if solved:
+            # no need to fill the generation once it has a solution, which
+            # goes first
+            next_gen.sort(key=lambda x: x.fitness())
+
+        self.log.debug('Best fitness: %s',
+                       min(x.fitness() for x in next_gen))
+        return next_gen
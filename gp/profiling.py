@@ -0,0 +1,134 @@
+import collections
+import cProfile
+import logging
+import sys
+from typing import Dict, List, Optional, TextIO
+
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.compiler import CompiledEmulator
+from gp.gene import Gene
+from gp.metrics import GenerationRecord, Sink
+
+# phases of a generation, as timed by `Evolve`
+PHASES = ('select', 'mutate', 'evaluate')
+
+
+class ProfilingEmulator(CompiledEmulator):
+    """
+    Emulator that steps through every command with the interpreter,
+    counting how often each command and each loop's brackets are executed
+
+    Counts are kept for every emulator in the process, in `opcodes` and
+    `loops`. Output and cycles are the same as `CompiledEmulator`, but runs
+    are as slow as `BrainfuckEmulator`, and no snapshots are taken. Cycles
+    that loop detection skips over, or that `gp.analysis` worked out before
+    the run, aren't counted.
+    """
+    log = logging.getLogger(__name__)
+
+    # executions of every command
+    opcodes: collections.Counter = collections.Counter()
+    # bracket executions of every loop, by the loop's source
+    loops: collections.Counter = collections.Counter()
+
+    def __init__(self, code: str,
+                 input_string: str,
+                 max_iter: int,
+                 cell_bits: Optional[int] = None) -> None:
+        super().__init__(code, input_string, max_iter, cell_bits)
+
+        # source of the loop every bracket belongs to
+        self.sites: Dict[int, str] = {}
+        for start, stop in self.jmp_map.items():
+            if start < stop:
+                self.sites[start] = self.sites[stop] = code[start:stop + 1]
+
+    def _execute(self, stream):
+        return BrainfuckEmulator._execute(self, stream)
+
+    def _step(self):
+        pptr = self.state.pptr
+        self.opcodes[self.code[pptr]] += 1
+        if pptr in self.sites:
+            self.loops[self.sites[pptr]] += 1
+        super()._step()
+
+
+class Profiler(Sink):
+    """
+    Profiles evolution in this process: the time spent in every function,
+    every phase of a generation, and the commands genes execute
+
+    Used as a context manager around `generate_solution`, with the profiler
+    added to the `Evolve` as a sink so it gets the phase times. Genes are
+    run on `ProfilingEmulator` in the meantime. On the way out a summary is
+    written to `stream` and, if given a path, `cProfile` stats are dumped
+    to it for `pstats` or any tool that reads them.
+
+    None of this costs anything unless a profiler is running.
+    """
+    log = logging.getLogger(__name__)
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 stream: TextIO = sys.stderr,
+                 top: int = 10) -> None:
+        """
+        :param path: File to dump `cProfile` stats to
+        :param stream: Where the summary is written
+        :param top: Number of loops to list in the summary
+        """
+        self.path = path
+        self.stream = stream
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.generations = 0
+        self.phases: collections.Counter = collections.Counter()
+
+    def __enter__(self) -> 'Profiler':
+        ProfilingEmulator.opcodes.clear()
+        ProfilingEmulator.loops.clear()
+        self._engine, Gene.engine = Gene.engine, ProfilingEmulator
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.profile.disable()
+        Gene.engine = self._engine
+        if self.path is not None:
+            self.profile.dump_stats(self.path)
+            self.log.info('Profile written to %s', self.path)
+        self.stream.write(self.summary())
+
+    def record(self, record: GenerationRecord) -> None:
+        self.generations += 1
+        self.phases['select'] += record.select_time
+        self.phases['mutate'] += record.mutate_time
+        self.phases['evaluate'] += record.evaluate_time
+        self.phases['wall'] += record.wall_time
+
+    def summary(self) -> str:
+        """A table of where the time and cycles went"""
+        lines: List[str] = []
+        wall = self.phases['wall'] or 1
+        lines.append('Phases over {} generations:'.format(self.generations))
+        for phase in PHASES:
+            lines.append('  {:<10} {:>10.3f}s {:>7.1%}'.format(
+                phase, self.phases[phase], self.phases[phase] / wall))
+        lines.append('  {:<10} {:>10.3f}s'.format('total',
+                                                  self.phases['wall']))
+
+        opcodes = ProfilingEmulator.opcodes
+        total = sum(opcodes.values()) or 1
+        lines.append('Commands executed:')
+        for command, count in opcodes.most_common():
+            lines.append('  {:<10} {:>11,} {:>7.1%}'.format(
+                command, count, count / total))
+
+        loops = ProfilingEmulator.loops
+        lines.append('Busiest loops, by bracket executions:')
+        for loop, count in loops.most_common(self.top):
+            if len(loop) > 40:
+                loop = loop[:37] + '...'
+            lines.append('  {:<40} {:>11,}'.format(loop, count))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,172 @@
+import math
+from typing import List, Optional, Set, Union
+
+from gp.cache import Result
+from gp.evaluate import Evaluator
+from gp.gene import CaseRun, Gene
+from gp.trainer import Trainer
+
+
+class Race(object):
+    """
+    Run of a gene on every case of a trainer, that can be paused once it has
+    used up a budget of cycles and resumed later with a bigger one
+
+    Cases are run one after another, each with the same budget. A case that
+    runs out of cycles holds back the cases after it until the next round.
+    """
+
+    def __init__(self,
+                 gene: Gene,
+                 trainer: Trainer,
+                 max_iter: int) -> None:
+        """
+        :param gene: Gene to run
+        :param trainer: Trainer the gene was created with
+        :param max_iter: Maximum iterations the program can run, per case
+        """
+        self.gene = gene
+        self.trainer = trainer
+        self.cases = trainer.cases()
+        if not self.cases:
+            raise ValueError('Trainer has no cases to run the gene on')
+        self.max_iter = max_iter
+
+        # runs of the cases started so far
+        self.runs: List[CaseRun] = []
+        self.current = 0  # index of the first case that isn't done
+        self.bound: Optional[Union[int, float]] = None  # set once stopped
+
+    @property
+    def done(self) -> bool:
+        """Whether the run is over, because of its threshold or otherwise"""
+        return self.bound is not None or self.current == len(self.cases)
+
+    def fitness(self, cases: Optional[int] = None) -> Union[int, float]:
+        """
+        Fitness of the output produced so far, exact once done
+
+        :param cases: Only count this many of the cases
+        """
+        outputs = [run.output for run in self.runs]
+        outputs += [''] * (len(self.cases) - len(outputs))
+        return sum(case.check_fitness(out) for case, out in
+                   zip(self.cases[:cases], outputs[:cases]))
+
+    def result(self) -> Result:
+        """
+        Output, fitness and cycles of the program, like `score` gives, as
+        far as it has got
+        """
+        cycles: Optional[int] = None
+        if all(run.cycles is not None for run in self.runs):
+            cycles = sum(run.cycles for run in self.runs)
+        if self.bound is not None:
+            return None, self.bound, cycles
+        return self.runs[0].output if self.runs else '', self.fitness(), \
+            cycles
+
+    def advance(self,
+                budget: int,
+                threshold: Optional[Union[int, float]] = None) -> None:
+        """
+        Run the program until every case is done or it has used `budget`
+        cycles on one
+
+        :param budget: Cycles each case may have used by the end, the run is
+            done once this reaches `max_iter`
+        :param threshold: Stop the program once its fitness is known to be at
+            least this
+        """
+        while not self.done:
+            n = self.current
+            if n == len(self.runs):
+                self.runs.append(CaseRun(self.gene, self.cases[n],
+                                         self.max_iter, resume=not n))
+            run = self.runs[n]
+
+            before = self.fitness(n)
+            run.advance(None if threshold is None else threshold - before,
+                        budget)
+            if run.bound is not None:
+                self.trainer.stopped_at(run.case)
+                self.bound = before + run.bound
+                return
+            if not run.done:
+                return  # out of budget, for now
+            self._next_case(threshold)
+
+    def _next_case(self, threshold: Optional[Union[int, float]]) -> None:
+        """Move on from a case that is done, unless that's far enough"""
+        case = self.cases[self.current]
+        self.current += 1
+        if threshold is not None and not self.done \
+                and self.fitness(self.current) >= threshold:
+            self.trainer.stopped_at(case)
+            self.bound = self.fitness(self.current)
+
+
+class RacingEvaluator(Evaluator):
+    """
+    Evaluates genes with successive halving: every gene gets a small budget
+    of cycles, and only the best part of those still running get to carry on
+    with a bigger one, and so on up to `max_iter`
+
+    Genes that are dropped from the race keep the fitness of the output they
+    produced by then, as if they had been run with a smaller `max_iter`.
+    That is the point, slow programs are rarely the good ones, but a dropped
+    gene's fitness can be worse than it would be if it was run to the end,
+    so it stays with the gene rather than going in the shared cache. Genes
+    carry on from where they were rather than starting over.
+    """
+
+    def __init__(self,
+                 max_iter: int = 100_000,
+                 min_budget: int = 1_000,
+                 eta: int = 2) -> None:
+        """
+        :param max_iter: Maximum iterations each program can run, per case
+        :param min_budget: Cycles every gene gets in the first round
+        :param eta: Factor by which the budget grows every round, and by
+            which the number of genes still running shrinks
+        """
+        if min_budget < 1:
+            raise ValueError('Budget must be at least one cycle: {}'
+                             .format(min_budget))
+        if eta <= 1:
+            raise ValueError('Budget has to grow every round: eta={}'
+                             .format(eta))
+        self.max_iter = max_iter
+        self.min_budget = min_budget
+        self.eta = eta
+
+        # genes dropped from a race whose results haven't been loaded yet
+        self._dropped: Set[Gene] = set()
+
+    def _run(self,
+             trainer: Trainer,
+             genes: List[Gene],
+             threshold: Optional[Union[int, float]] = None) -> List[Result]:
+        races = [Race(g, trainer, self.max_iter) for g in genes]
+        running = races
+        budget = self.min_budget
+        while running:
+            for race in running:
+                race.advance(budget, threshold)
+            running = [race for race in running if not race.done]
+
+            # the ones that come out best on their output so far carry on
+            running.sort(key=Race.fitness)
+            running = running[:math.ceil(len(running) / self.eta)]
+            budget *= self.eta
+
+        self.log.debug('Raced %s genes up to a budget of %s cycles',
+                       len(genes), min(budget // self.eta, self.max_iter))
+        self._dropped.update(race.gene for race in races if not race.done)
+        return [race.result() for race in races]
+
+    def _exact(self, g: Gene) -> bool:
+        if g in self._dropped:
+            self._dropped.discard(g)
+            return False
+        return True
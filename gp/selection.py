@@ -0,0 +1,155 @@
+import itertools
+import math
+import random
+from typing import Callable, Generic, List, Sequence, TypeVar, Union
+
+# Type variable for whatever is being selected, usually genes
+X = TypeVar('X')
+
+Fitness = Union[int, float]
+
+
+def inverse_weights(fitnesses: Sequence[Fitness]) -> List[float]:
+    """
+    Weights inversely proportional to fitness, where lower is better
+
+    Perfect (zero) fitnesses share all of the weight between them and
+    infinite ones get none. If every fitness is infinite, they are all
+    weighted the same.
+
+    :param fitnesses: Fitnesses to weight
+    :return: Weight of every fitness, in order
+    """
+    if any(f == 0 for f in fitnesses):
+        return [float(f == 0) for f in fitnesses]
+    weights = [1 / f for f in fitnesses]
+    if not any(weights):
+        return [1.0] * len(weights)
+    return weights
+
+
+class Selector(Generic[X]):
+    """
+    Picks parents out of a generation, where a lower fitness is better
+
+    `build` does the work needed for a generation once, after which any
+    number of parents can be drawn cheaply.
+    """
+
+    def build(self,
+              population: Sequence[X],
+              key: Callable[[X], Fitness]) -> None:
+        """
+        Get ready to select from a generation
+
+        :param population: Generation to select from
+        :param key: Function to extract the fitness of a member
+        """
+        self.population = list(population)
+        self._build([key(x) for x in self.population])
+
+    def _build(self, fitnesses: List[Fitness]) -> None:
+        """Prepare the fitnesses of `population`, in order"""
+        raise NotImplementedError
+
+    def sample(self, k: int) -> List[X]:
+        """
+        Draw members of the generation, with replacement
+
+        :param k: Number of members to draw
+        :return: The members drawn
+        """
+        raise NotImplementedError
+
+    def choice(self) -> X:
+        """Draw a single member of the generation"""
+        return self.sample(1)[0]
+
+
+class WeightedSelector(Selector[X]):
+    """
+    Draws members with probability proportional to a weight, using a table
+    of cumulative weights so every draw is a binary search
+    """
+
+    def _weights(self, fitnesses: List[Fitness]) -> List[float]:
+        """Weight of every member"""
+        raise NotImplementedError
+
+    def _build(self, fitnesses):
+        self.cum_weights = list(itertools.accumulate(
+            self._weights(fitnesses)))
+
+    def sample(self, k):
+        return random.choices(self.population, cum_weights=self.cum_weights,
+                              k=k)
+
+
+class RouletteSelector(WeightedSelector[X]):
+    """Fitness proportionate selection, on the inverse of the fitness"""
+
+    def _weights(self, fitnesses):
+        return inverse_weights(fitnesses)
+
+
+class RankSelector(WeightedSelector[X]):
+    """
+    Linear ranking, so selection pressure doesn't depend on how far apart
+    the fitnesses are
+    """
+
+    def __init__(self, pressure: float = 1.5) -> None:
+        """
+        :param pressure: Expected number of draws of the best member per
+            draw of an average one, between 1 and 2
+        """
+        self.pressure = pressure
+
+    def _weights(self, fitnesses):
+        n = len(fitnesses)
+        step = 2 * (self.pressure - 1) / (n - 1) if n > 1 else 0
+        weights = [0.0] * n
+        order = sorted(range(n), key=fitnesses.__getitem__)
+        for rank, i in enumerate(order):
+            weights[i] = self.pressure - rank * step
+        return weights
+
+
+class TournamentSelector(Selector[X]):
+    """Draws the fittest of a few members picked at random"""
+
+    def __init__(self, size: int = 3) -> None:
+        """
+        :param size: Number of members in each tournament
+        """
+        self.size = size
+
+    def _build(self, fitnesses):
+        self.fitnesses = fitnesses
+
+    def sample(self, k):
+        n = len(self.population)
+        winners = []
+        for _ in range(k):
+            entrants = [random.randrange(n) for _ in range(self.size)]
+            winner = min(entrants, key=self.fitnesses.__getitem__)
+            winners.append(self.population[winner])
+        return winners
+
+
+class TruncationSelector(Selector[X]):
+    """Draws uniformly from the fittest part of the generation"""
+
+    def __init__(self, fraction: float = 0.5) -> None:
+        """
+        :param fraction: Part of the generation that can be drawn
+        """
+        self.fraction = fraction
+
+    def _build(self, fitnesses):
+        kept = max(1, math.ceil(len(fitnesses) * self.fraction))
+        order = sorted(range(len(fitnesses)), key=fitnesses.__getitem__)
+        self.fittest = [self.population[i] for i in order[:kept]]
+
+    def sample(self, k):
+        return random.choices(self.fittest, k=k)
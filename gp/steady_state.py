@@ -0,0 +1,162 @@
+import collections
+import heapq
+import itertools
+import math
+import random
+from typing import Iterator, List, Optional, Tuple, Union
+
+from gp.behaviour import BehaviourIndex
+from gp.evaluate import Evaluator
+from gp.evolve import Evolve
+from gp.gene import Gene
+from gp.trainer import Trainer
+
+
+class Population(object):
+    """
+    Genes kept in a heap with the worst one on top, so that it can be looked
+    at for free and replaced in O(log n)
+    """
+
+    def __init__(self, genes: List[Gene]) -> None:
+        """
+        :param genes: Evaluated genes to start with
+        """
+        # entries are (-fitness, order of arrival, gene), the order breaks
+        # ties so genes are never compared
+        self._counter = itertools.count()
+        self._heap: List[Tuple[Union[int, float], int, Gene]] = [
+            (-g.fitness(), next(self._counter), g) for g in genes]
+        heapq.heapify(self._heap)
+        self.best = min(genes, key=lambda x: x.fitness())
+
+        # number of genes in the population with every behaviour, so looking
+        # for a clone doesn't take a pass over all of them
+        self.fingerprints = collections.Counter(
+            BehaviourIndex.fingerprint(g) for g in genes)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[Gene]:
+        return (g for _, _, g in self._heap)
+
+    @property
+    def worst(self) -> Gene:
+        """The gene with the highest fitness"""
+        return self._heap[0][2]
+
+    def replace_worst(self, g: Gene) -> Gene:
+        """
+        Put an evaluated gene in place of the worst one
+
+        :param g: Gene to add
+        :return: The gene that was taken out
+        """
+        _, _, worst = heapq.heapreplace(
+            self._heap, (-g.fitness(), next(self._counter), g))
+        if g.fitness() < self.best.fitness():
+            self.best = g
+
+        self.fingerprints[BehaviourIndex.fingerprint(g)] += 1
+        fingerprint = BehaviourIndex.fingerprint(worst)
+        self.fingerprints[fingerprint] -= 1
+        if not self.fingerprints[fingerprint]:
+            del self.fingerprints[fingerprint]
+        return worst
+
+    def tournament(self, size: int) -> Gene:
+        """
+        Draw the fittest of a few genes picked at random
+
+        :param size: Number of genes in the tournament
+        :return: The winner
+        """
+        return max(random.choices(self._heap, k=size))[2]
+
+
+class SteadyStateEvolve(Evolve):
+    """
+    Evolves programs one child at a time rather than a generation at a time
+
+    Every child that does better than the worst gene in the population takes
+    its place right away, so a good child can be picked as a parent for the
+    very next one. Parents are picked by tournament, which unlike the
+    selectors doesn't need any preparation when the population changes.
+    """
+
+    def __init__(self,
+                 trainer: Trainer,
+                 genes_per_gen: int = 24,
+                 workers: int = 1,
+                 evaluator: Optional[Evaluator] = None,
+                 tournament: int = 3,
+                 batch: int = 2,
+                 dedup: bool = False) -> None:
+        """
+        :param genes_per_gen: Number of genes in the population
+        :param tournament: Number of genes in each tournament for a parent
+        :param batch: Number of children bred and evaluated at a time, more
+            keeps a pool of workers busy
+        :param dedup: Keep children that behave the same as a gene in the
+            population out of it, see `Evolve`
+        """
+        super().__init__(trainer, genes_per_gen, workers, evaluator,
+                         dedup=dedup)
+        self.tournament = tournament
+        self.batch = batch
+
+    def generate_solution(self) -> str:
+        self._mark = self._counts()
+        try:
+            population = Population(self.generation_zero())
+            self.report(0, list(population))
+            children_counter = 0
+            while population.best.fitness() != 0:
+                children = []
+                for _ in range(math.ceil(self.batch / 2)):
+                    with self._phase('select'):
+                        w1 = population.tournament(self.tournament)
+                    with self._phase('mutate'):
+                        w2 = Gene(self.trainer, self.donors.draw())
+                        children.extend(self.mutate(w1, w2))
+
+                # children that can't beat the worst gene are stopped as soon
+                # as that is certain
+                worst = population.worst.fitness()
+                with self._phase('evaluate'):
+                    self.evaluator.evaluate(self.trainer, children, worst)
+                for child in children:
+                    children_counter += 1
+                    # a generation's worth of children makes up a record
+                    if children_counter % self.per_gen == 0:
+                        self.report(children_counter // self.per_gen,
+                                    list(population))
+                    if child.fitness(worst) < population.worst.fitness():
+                        child = self.represent(child)
+                        if self.clone(population, child):
+                            self._rejected += 1
+                            continue
+                        best = population.best
+                        population.replace_worst(child)
+                        if population.best is not best:
+                            self.log.debug('[Child #%s]\tBest fitness: %s',
+                                           children_counter,
+                                           population.best.fitness())
+                    else:
+                        self._rejected += 1
+        finally:
+            self.evaluator.close()
+            for sink in self.sinks:
+                sink.close()
+
+        return population.best.gene
+
+    def clone(self, population: Population, g: Gene) -> bool:
+        """
+        Whether a gene in the population behaves the same as `g`, always
+        False unless deduplicating
+        """
+        if self.behaviours is None:
+            return False
+        return BehaviourIndex.fingerprint(g) in population.fingerprints
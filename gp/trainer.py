@@ -1,5 +1,8 @@
+import collections
 import logging
-from typing import Union
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
 
 
 class Trainer(object):
@@ -21,6 +24,14 @@ class Trainer(object):
         """Generate the expected output given the above input"""
         raise NotImplementedError
 
+    def output_length(self) -> Optional[int]:
+        """
+        How many characters of output `check_fitness` looks at, so programs
+        can be stopped once they have produced that much. None if all of the
+        output matters.
+        """
+        return None
+
     def check_fitness(self, output: str) -> Union[int, float]:
         """
         Given an output, generate a number between [0, +inf) that indicates the
@@ -28,37 +39,210 @@ class Trainer(object):
         """
         raise NotImplementedError
 
+    def check_fitness_batch(self,
+                            outputs: Sequence[str]) -> List[Union[int, float]]:
+        """
+        The fitness of many outputs at once, the same as `check_fitness` of
+        each
+
+        :param outputs: Outputs of programs on the input of this trainer
+        :return: Fitness of every output, in order
+        """
+        return [self.check_fitness(output) for output in outputs]
 
-class Hello(Trainer):
-    """A trainer to generate a program that what writes out `Hello World!`"""
+    def scorer(self) -> 'Scorer':
+        """Make a scorer to follow the output of one program as it runs"""
+        return Scorer(self)
 
-    def __init__(self):
+    def cases(self) -> Sequence['Trainer']:
         """
-        TODO: Does Hello need anything set up?
+        Single case trainers to test a program on, in the order to run them
+        in. The fitness of a program is the sum of its fitness on each.
         """
-        super().__init__()
+        return (self,)
 
-    def gen_in(self):
+    def stopped_at(self, case: 'Trainer') -> None:
         """
-        TODO: Should any input be provided?
+        Note that a program was stopped early because of its fitness on a
+        case
+
+        :param case: One of `cases()`
         """
-        return ''
+        pass
+
+
+class Scorer(object):
+    """
+    Scores the output of a program incrementally, as it is produced
+
+    While the program runs, `bound()` is a lower bound on the fitness of any
+    output starting with what has been fed so far. This trainer agnostic
+    version knows nothing about the fitness until the program is done.
+    """
+
+    def __init__(self, trainer: Trainer) -> None:
+        """
+        :param trainer: Trainer whose fitness is being bounded
+        """
+        self.trainer = trainer
+        self.output = ''
+
+    def feed(self, chars: str) -> None:
+        """
+        Take in more of the program's output
+
+        :param chars: Output produced since the last call
+        """
+        self.output += chars
+
+    def bound(self) -> Union[int, float]:
+        """Lower bound on the final fitness, given the output so far"""
+        return 0
+
+
+class Match(Trainer):
+    """A trainer for a program that writes out a given string"""
+
+    def __init__(self, input_string: str, expected: str) -> None:
+        """
+        :param input_string: Input given to the program
+        :param expected: Output the program should produce
+        """
+        super().__init__()
+        self.input_string = input_string
+        self.expected = expected
+
+        # code points of the expected output, and the cost of leaving out
+        # everything from each position on, so outputs are scored without
+        # going back to the string
+        self.codes = np.array([ord(c) for c in expected], dtype=np.int64)
+        self.missing = np.append(np.cumsum((self.codes ** 2)[::-1])[::-1],
+                                 0)
+
+    def gen_in(self):
+        return self.input_string
 
     def gen_out(self):
-        return 'Hello world!'
+        return self.expected
+
+    def output_length(self):
+        """Only the first `len(gen_out())` characters are compared"""
+        return len(self.gen_out())
 
     def check_fitness(self, output):
         """
-        Calculate how close the output is to "Hello world!"
+        Calculate how close the output is to the expected output
+
+        The distance between strings is the sum of the difference between
+        each ASCII character, and the square of every expected character
+        missing from the output.
+        """
+        fitness = sum(abs(ord(e) - ord(c))
+                      for e, c in zip(self.expected, output))
+        return fitness + int(self.missing[min(len(output),
+                                              len(self.expected))])
+
+    def check_fitness_batch(self, outputs):
+        """
+        Score every output at once, as rows of a 2-D array of code points
 
-        The distance between strings is calculated is the square of the
-        difference between each ASCII character.
+        Outputs are cut off or padded to the length of the expected output,
+        and padding is scored as missing.
         """
-        expected = self.gen_out()
-        fitness = 0
-        for n, i in enumerate(expected):
-            try:
-                fitness += abs(ord(i) - ord(output[n]))
-            except IndexError:
-                fitness += abs(ord(i)) ** 2
-        return fitness
+        width = len(self.expected)
+        if not width:
+            return [0] * len(outputs)
+
+        padded = ''.join(output[:width].ljust(width, '\0')
+                         for output in outputs)
+        codes = np.frombuffer(padded.encode('utf-32-le', 'surrogatepass'),
+                              dtype=np.uint32).reshape(-1, width)
+        lengths = np.fromiter((min(len(output), width) for output in outputs),
+                              dtype=np.int64, count=len(outputs))
+        present = np.arange(width) < lengths[:, None]
+        distance = np.abs(codes.astype(np.int64) - self.codes)
+        fitness = (distance * present).sum(axis=1) + self.missing[lengths]
+        return fitness.tolist()
+
+    def scorer(self):
+        return MatchScorer(self)
+
+
+class MatchScorer(Scorer):
+    """
+    Incremental version of `Match.check_fitness`
+
+    The fitness is a sum over positions, so every character produced adds
+    its distance to the bound. Positions not yet produced could still match
+    exactly and count as zero.
+    """
+
+    def __init__(self, trainer: Match) -> None:
+        super().__init__(trainer)
+        self.expected = trainer.gen_out()
+        self.distance = 0
+
+    def feed(self, chars):
+        for c in chars[:len(self.expected) - len(self.output)]:
+            self.distance += abs(ord(self.expected[len(self.output)]) -
+                                 ord(c))
+            self.output += c
+
+    def bound(self):
+        return self.distance
+
+
+class Hello(Match):
+    """A trainer to generate a program that what writes out `Hello World!`"""
+
+    def __init__(self):
+        super().__init__('', 'Hello world!')
+
+
+class Suite(Trainer):
+    """
+    A trainer made up of many cases, each a single case trainer, e.g. an
+    input and the output expected for it
+
+    The fitness is the sum of the fitness on every case. Cases that stop
+    genes early are moved to the front, so later genes are stopped as early
+    as possible too.
+    """
+
+    def __init__(self, cases: Sequence[Trainer]) -> None:
+        """
+        :param cases: Cases to test programs on, the ones most programs fail
+            first if known
+        """
+        super().__init__()
+        self._cases = list(cases)
+        self.stops: Dict[Trainer, int] = collections.Counter()
+
+    def cases(self):
+        return tuple(self._cases)
+
+    def stopped_at(self, case):
+        self.stops[case] += 1
+        # sorting a list in place empties it for the time being, so a
+        # sorted copy takes its place for threads calling `cases()`
+        self._cases = sorted(self._cases, key=lambda c: -self.stops[c])
+
+
+class Reverse(Suite):
+    """A trainer to generate a program that reverses its input"""
+
+    def __init__(self, inputs: Sequence[str] = ('ab', 'gp', 'abc', 'hello',
+                                                'brainf')) -> None:
+        super().__init__([Match(i, i[::-1]) for i in inputs])
+
+
+class AddDigits(Suite):
+    """
+    A trainer to generate a program that adds up two digits, e.g. that
+    writes out `7` given `34`
+    """
+
+    def __init__(self) -> None:
+        super().__init__([Match('{}{}'.format(a, b), str(a + b))
+                          for a, b in ((1, 2), (3, 4), (0, 0), (5, 4),
+                                       (2, 7), (6, 1))])
@@ -0,0 +1,218 @@
+import collections
+import math
+import os
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from gp import metrics
+from gp.cache import Result
+from gp.evaluate import ProcessEvaluator, score
+from gp.gene import Gene
+from gp.trainer import Trainer
+
+# what the length of an output in the results block means when negative
+REJECTED = -1  # stopped early, so there is no output
+OVERFLOW = -2  # too long for the block, sent back with the control message
+
+
+class Layout(NamedTuple):
+    """Where a batch of genes and their results lie in shared memory"""
+    codes: str  # name of the block of programs, see `pack`
+    results: str  # name of the block of results, see `results`
+    size: int  # number of genes
+    capacity: int  # characters of output each gene has room for
+
+
+def pack(codes: Sequence[str]) -> shared_memory.SharedMemory:
+    """
+    Copy programs into a new block of shared memory: a table of `len(codes)
+    + 1` offsets, followed by every program one after another as bytes
+
+    :param codes: Brainfuck programs, which are ASCII
+    :return: The block, for the caller to close and unlink
+    """
+    data = ''.join(codes).encode('ascii')
+    table = 8 * (len(codes) + 1)
+    block = shared_memory.SharedMemory(create=True, size=table + len(data))
+    offsets = np.ndarray(len(codes) + 1, np.int64, block.buf)
+    offsets[0] = 0
+    np.cumsum([len(code) for code in codes], out=offsets[1:])
+    block.buf[table:table + len(data)] = data
+    del offsets  # views have to go before the block can be closed
+    return block
+
+
+def unpack(block: shared_memory.SharedMemory,
+           size: int,
+           start: int,
+           stop: int) -> List[str]:
+    """
+    Read programs `start` to `stop` back out of a block made by `pack`
+
+    :param block: Block of programs
+    :param size: Number of programs in the block
+    :return: The programs
+    """
+    table = 8 * (size + 1)
+    offsets = np.ndarray(size + 1, np.int64, block.buf).tolist()
+    data = bytes(block.buf[table + offsets[start]:table + offsets[stop]])
+    base = offsets[start]
+    return [data[offsets[n] - base:offsets[n + 1] - base].decode('ascii')
+            for n in range(start, stop)]
+
+
+def results(block: shared_memory.SharedMemory,
+            size: int,
+            capacity: int) -> Tuple[np.ndarray, ...]:
+    """
+    Views of the arrays in a block of results, one row per gene
+
+    :param block: Block of at least `results_size(size, capacity)` bytes
+    :param size: Number of genes
+    :param capacity: Characters of output each gene has room for
+    :return: Fitness, cycles (-1 for unknown), output length and output code
+        points of every gene
+    """
+    fitness = np.ndarray(size, np.float64, block.buf)
+    cycles = np.ndarray(size, np.int64, block.buf, 8 * size)
+    lengths = np.ndarray(size, np.int64, block.buf, 16 * size)
+    outputs = np.ndarray((size, capacity), np.uint32, block.buf, 24 * size)
+    return fitness, cycles, lengths, outputs
+
+
+def results_size(size: int, capacity: int) -> int:
+    """Bytes taken up by the results of `size` genes"""
+    return max(size * (24 + 4 * capacity), 1)
+
+
+def score_shared(trainer: Trainer,
+                 layout: Layout,
+                 start: int,
+                 stop: int,
+                 threshold: Optional[Union[int, float]] = None) \
+        -> Tuple[Dict[int, str], collections.Counter]:
+    """
+    Run genes `start` to `stop` of a batch in shared memory, in a worker
+    process, and write their results back to it
+
+    :param trainer: Trainer to score the programs with
+    :param layout: Where the batch is
+    :param threshold: Stop programs once their fitness is known to be at
+        least this
+    :return: Outputs too long for the results block, by index, and the
+        events counted while running the genes
+    """
+    before = metrics.events.copy()
+    codes = shared_memory.SharedMemory(layout.codes)
+    block = shared_memory.SharedMemory(layout.results)
+    overflow = {}
+    fitness = cycles = lengths = outputs = None
+    try:
+        genes = [Gene(trainer, code) for code in
+                 unpack(codes, layout.size, start, stop)]
+        fitness, cycles, lengths, outputs = results(block, layout.size,
+                                                    layout.capacity)
+        for n, (output, fit, cyc) in enumerate(score(trainer, genes,
+                                                     threshold),
+                                               start):
+            fitness[n] = fit
+            cycles[n] = -1 if cyc is None else cyc
+            if output is None:
+                lengths[n] = REJECTED
+            elif len(output) > layout.capacity:
+                lengths[n] = OVERFLOW
+                overflow[n] = output
+            else:
+                lengths[n] = len(output)
+                outputs[n, :len(output)] = np.frombuffer(
+                    output.encode('utf-32-le', 'surrogatepass'), np.uint32)
+    finally:
+        # views have to go before the blocks can be closed
+        fitness = cycles = lengths = outputs = None
+        codes.close()
+        block.close()
+    return overflow, metrics.events - before
+
+
+class SharedMemoryEvaluator(ProcessEvaluator):
+    """
+    Evaluates genes on a pool of processes, passing programs and results
+    through shared memory rather than pickling genes
+
+    A batch is packed into one block of shared memory, and workers write
+    fitness, cycles and output into another, so the only messages between
+    processes are which slice of the batch to run and the occasional output
+    too long for its row. Genes are run from the start in the workers: the
+    snapshots inherited from their parents aren't sent along.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 chunks_per_worker: int = 4,
+                 capacity: Optional[int] = None) -> None:
+        """
+        :param capacity: Characters of output each gene has room for in
+            shared memory, by default what the trainer's first case looks at
+            or 64 if it looks at all of it. Longer outputs are pickled.
+        """
+        super().__init__(workers, chunks_per_worker)
+        self.capacity = capacity
+
+    def _run(self, trainer, genes, threshold=None):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self.executor_type(self.workers)
+        if not genes:
+            return []
+
+        capacity = self.capacity or trainer.cases()[0].output_length() or 64
+        workers = self.workers or os.cpu_count() or 1
+        size = math.ceil(len(genes) / (workers * self.chunks_per_worker))
+        starts = range(0, len(genes), size)
+
+        codes = pack([g.gene for g in genes])
+        block = shared_memory.SharedMemory(
+            create=True, size=results_size(len(genes), capacity))
+        try:
+            layout = Layout(codes.name, block.name, len(genes), capacity)
+            overflow: Dict[int, str] = {}
+            for chunk_overflow, counted in self._executor.map(
+                    score_shared,
+                    [trainer] * len(starts),
+                    [layout] * len(starts),
+                    starts,
+                    [min(start + size, len(genes)) for start in starts],
+                    [threshold] * len(starts)):
+                overflow.update(chunk_overflow)
+                metrics.events.update(counted)
+            return self._unload(block, layout, overflow)
+        finally:
+            codes.close()
+            codes.unlink()
+            block.close()
+            block.unlink()
+
+    @staticmethod
+    def _unload(block: shared_memory.SharedMemory,
+                layout: Layout,
+                overflow: Dict[int, str]) -> List[Result]:
+        """Read the results of every gene back out of shared memory"""
+        fitness, cycles, lengths, outputs = results(block, layout.size,
+                                                    layout.capacity)
+        loaded = []
+        for n, (fit, cyc, length) in enumerate(zip(fitness.tolist(),
+                                                   cycles.tolist(),
+                                                   lengths.tolist())):
+            if length == REJECTED:
+                output = None
+            elif length == OVERFLOW:
+                output = overflow[n]
+            else:
+                output = outputs[n, :length].tobytes().decode(
+                    'utf-32-le', 'surrogatepass')
+            loaded.append((output,
+                           int(fit) if fit.is_integer() else fit,
+                           None if cyc == -1 else cyc))
+        return loaded
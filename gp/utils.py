@@ -1,6 +1,8 @@
 import random
 from typing import Callable, Sequence, TypeVar, Union
 
+from gp import selection
+
 
 def visualize_control_chars(s: str) -> str:
     """
@@ -67,23 +69,16 @@ def weighted_choice(object_list: Sequence[X],
                     inverse: bool = False) -> X:
     """
     Makes a weighted selection from a list of weighted objects
+
+    Every weight is worked out again on each call, so use a
+    `selection.Selector` to make many selections from the same list.
+
     :param inverse: inversely proportional to size
     :param object_list: list of any type of object that can be weighted
     :param key: function to extract keyvalue from a list
     :return: The selected list element
     """
-    ol = [key(x) for x in object_list]
-
+    weights = [key(x) for x in object_list]
     if inverse:
-        total = sum([x for x in ol])
-        ol = [total / x for n, x in enumerate(ol)]
-
-    total = sum([x for x in ol])
-    interval_tuples = [tuple((x / total, n)) for n, x in enumerate(ol)]
-
-    choice = random.random()
-    choice -= interval_tuples[0][0]
-    while choice > 0:
-        interval_tuples = interval_tuples[1:]
-        choice -= interval_tuples[0][0]
-    return object_list[interval_tuples[0][1]]
+        weights = selection.inverse_weights(weights)
+    return random.choices(object_list, weights)[0]
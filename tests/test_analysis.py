@@ -0,0 +1,78 @@
+import random
+import unittest
+from unittest import TestCase
+
+from gp import analysis
+from gp.analysis import Analysis, analyze
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.compiler import CompiledEmulator
+from gp.gene import Gene
+
+
+class TestAnalyze(TestCase):
+    """Test the function `analysis.analyze(code, input_string, max_iter)`"""
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(analyze(''), Analysis(analysis.SILENT, ''))
+
+    def test_silent(self):
+        """Test output only in loops that can't be entered doesn't count"""
+        self.assertEqual(analyze('[.]+[-][.]').kind, analysis.SILENT)
+        self.assertEqual(analyze('+[.]').kind, analysis.UNKNOWN)
+
+    def test_trivial(self):
+        """Test simple loops are worked out"""
+        self.assertEqual(analyze('++++[->++<]>.[<]>[-].', 'AB'),
+                         Analysis(analysis.TRIVIAL, '\x08\x00'))
+        self.assertEqual(analyze(',.,.,.', 'AB'),
+                         Analysis(analysis.TRIVIAL, 'ABB'))
+
+    def test_hangs(self):
+        """Test loops that never reach zero"""
+        self.assertEqual(analyze('+.[>+<]+.'),
+                         Analysis(analysis.HANGS, '\x01'))
+        self.assertEqual(analyze('+++.[--].'),
+                         Analysis(analysis.HANGS, '\x03'))
+        self.assertEqual(analyze('+.[+].'), Analysis(analysis.HANGS, '\x01'))
+
+    def test_unknown(self):
+        """Test loops that aren't simple give up"""
+        self.assertEqual(analyze('+[.-]').kind, analysis.UNKNOWN)
+        self.assertEqual(analyze('+[>+[-]<-].').kind, analysis.UNKNOWN)
+
+    def test_max_iter(self):
+        """Test running out of cycles gives up"""
+        self.assertEqual(analyze('+' * 20 + '[-]+.', '', 50).kind,
+                         analysis.UNKNOWN)
+        self.assertEqual(analyze('+' * 20 + '[-]+.', '', 100).kind,
+                         analysis.TRIVIAL)
+
+    def test_emulator(self):
+        """Test known outputs are what the program produces"""
+        random.seed(0)
+        for _ in range(2000):
+            code = Gene.gen(length=random.randint(1, 30))
+            known = analyze(code, 'AB', 1000)
+            if known.kind != analysis.UNKNOWN:
+                self.assertEqual(known.output,
+                                 BrainfuckEmulator(code, 'AB', 1000).run())
+
+    def test_snapshot(self):
+        """Test running on from where the analysis gave up is like a run"""
+        random.seed(0)
+        for _ in range(1000):
+            code = Gene.gen(length=random.randint(1, 60))
+            known = analyze(code, 'AB', 1000)
+            if known.snapshot is None:
+                continue
+            expected = CompiledEmulator(code, 'AB', 1000)
+            expected.run()
+            emulator = CompiledEmulator(code, 'AB', 1000)
+            emulator.restore(known.snapshot)
+            self.assertEqual(emulator.run(), expected.out, code)
+            self.assertEqual(emulator.cycles, expected.cycles, code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import TestCase
+
+from gp.batch import BatchEmulator, BatchEvaluator
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.gene import Gene
+from gp.trainer import Hello, Reverse
+
+
+class TestBatchEmulatorRun(TestCase):
+    """Test the function `BatchEmulator.run()`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.codes = [
+            '',
+            ',+.,.,.',
+            '++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]'
+            '>>.>---.+++++++..+++.>>.<-.<.+++.------.--------.>>+.>++.',
+            '+[.]',
+            '-[-].',
+            '<' * 60 + '+.' + '>' * 120 + '+.',
+        ]
+
+    def check(self, max_iter, **kwargs):
+        e = BatchEmulator(self.codes, 'AB', max_iter, **kwargs)
+        outputs = e.run()
+        for n, code in enumerate(self.codes):
+            reference = BrainfuckEmulator(code, 'AB', max_iter)
+            self.assertEqual(outputs[n], reference.run())
+            self.assertEqual(e.cycles[n], reference.cycles)
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(BatchEmulator([], '', 10).run(), [])
+
+    def test_lockstep(self):
+        """Test running every program in lockstep"""
+        self.check(2000, stragglers=0, lockstep=3000)
+
+    def test_stragglers(self):
+        """Test handing long running programs over part way through"""
+        self.check(2000, stragglers=2, lockstep=50)
+
+    def test_max_iter(self):
+        """Test programs are stopped after `max_iter` cycles"""
+        self.check(30, stragglers=0)
+
+    def test_output_length(self):
+        """Test programs are stopped once they've produced enough output"""
+        for stragglers in (0, 10):
+            outputs = BatchEmulator(['+[.]', '.'], '', 1000, output_length=3,
+                                    stragglers=stragglers).run()
+            self.assertEqual(outputs, ['\x01' * 3, '\x00'])
+
+
+class TestBatchEvaluator(TestCase):
+    """Test the function `BatchEvaluator.evaluate(trainer, genes)`"""
+
+    def test_hello(self):
+        trainer = Hello()
+        codes = ['', '+.', '++[>+++<-]>.', ',[.]', '+' * 72 + '.']
+        expected = [trainer.check_fitness(BrainfuckEmulator(c, '', 1000).run())
+                    for c in codes]
+        genes = [Gene(trainer, c) for c in codes]
+        self.assertEqual(BatchEvaluator().evaluate(trainer, genes), expected)
+
+    def test_cases(self):
+        """Test trainers with many cases are run a case at a time"""
+        trainer = Reverse()
+        codes = [',.', ',>,.<.', '+[>,]<[.<]', ',[.,]']
+        Gene.cache.clear()
+        expected = [Gene(trainer, c).fitness() for c in codes]
+        Gene.cache.clear()
+        genes = [Gene(trainer, c) for c in codes]
+        self.assertEqual(BatchEvaluator().evaluate(trainer, genes), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
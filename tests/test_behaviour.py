@@ -0,0 +1,141 @@
+import itertools
+import random
+import threading
+import unittest
+from unittest import TestCase
+
+from gp.behaviour import BehaviourIndex
+from gp.evolve import Evolve
+from gp.gene import Gene
+from gp.trainer import Match
+
+
+class TestBehaviourIndex(TestCase):
+    """Test the class `BehaviourIndex`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.trainer = Match('', '\x02')
+        self.index = BehaviourIndex(max_entries=2)
+
+    def test_fingerprint(self):
+        """Test genes are fingerprinted by output and fitness once run"""
+        g = Gene(self.trainer, '++.')
+        self.assertIsNone(BehaviourIndex.fingerprint(g))
+        g.fitness()
+        self.assertEqual(BehaviourIndex.fingerprint(g), ('\x02', 0))
+
+    def test_representative(self):
+        """Test the shortest gene that behaves some way represents it"""
+        long = Gene(self.trainer, '+>+<+.')
+        short = Gene(self.trainer, '++.')
+        slow = Gene(self.trainer, '+[-]++.')
+        for g in (long, short, slow):
+            g.fitness()
+
+        self.assertIs(self.index.add(long), long)
+        self.assertIs(self.index.add(short), short)
+        self.assertIs(self.index.add(slow), short)
+        self.assertIs(self.index.add(long), short)
+        self.assertEqual(len(self.index), 1)
+
+    def test_unevaluated(self):
+        """Test genes that haven't been run are left alone"""
+        g = Gene(self.trainer, '++.')
+        self.assertIs(self.index.add(g), g)
+        self.assertEqual(len(self.index), 0)
+
+    def test_evict(self):
+        """Test the least recently seen behaviour is forgotten when full"""
+        genes = [Gene(self.trainer, '+' * n + '.') for n in range(3)]
+        for g in genes:
+            g.fitness()
+            self.index.add(g)
+        self.assertEqual(len(self.index), 2)
+        self.assertNotIn(BehaviourIndex.fingerprint(genes[0]),
+                         self.index.entries)
+
+
+class TestDedup(TestCase):
+    """Test `Evolve` keeps clones out of a generation"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        random.seed(0)
+        self.trainer = Match('', '\x02')
+        self.evolve = Evolve(self.trainer, dedup=True)
+
+    def test_admit(self):
+        generation = []
+        for code in ('+.', '+>+<+.', '++.', '+[-]++.', '+++.'):
+            g = Gene(self.trainer, code)
+            g.fitness()
+            self.evolve.admit(generation, g)
+        self.assertEqual([g.gene for g in generation], ['+.', '++.', '+++.'])
+
+    def test_without_dedup(self):
+        """Test every gene is admitted by default"""
+        evolve = Evolve(self.trainer)
+        generation = []
+        for code in ('++.', '++.', '+>+<+.'):
+            evolve.admit(generation, Gene(self.trainer, code))
+        self.assertEqual(len(generation), 3)
+
+    def test_admit_reordered(self):
+        """Test behaviours are found again once the generation is sorted"""
+        generation = []
+        for code in ('+++.', '+>+<+.', '+.'):
+            g = Gene(self.trainer, code)
+            g.fitness()
+            self.evolve.admit(generation, g)
+        generation.sort(key=lambda x: x.fitness())
+        g = Gene(self.trainer, '++.')
+        g.fitness()
+        self.assertFalse(self.evolve.admit(generation, g))
+        self.assertEqual([g.gene for g in generation], ['++.', '+++.', '+.'])
+
+    def test_offspring(self):
+        """Test no two genes in a generation behave the same"""
+        evolve = Evolve(Match('', 'Hi'), genes_per_gen=8, dedup=True)
+        generation = evolve.generation_zero()
+        for _ in range(3):
+            generation = evolve.offspring(generation)
+            fingerprints = [BehaviourIndex.fingerprint(g)
+                            for g in generation]
+            self.assertEqual(len(set(fingerprints)), len(generation))
+
+
+    def test_no_new_behaviours(self):
+        """Test clones are let in once nothing new beats the worst gene"""
+        trainer = Match('', '\x05\x02')
+        generation = [Gene(trainer, '+' * a + '.[-]' + '+' * b + '.')
+                      for a, b in itertools.product(range(2, 9), range(6))
+                      if 1 <= abs(a - 5) + abs(b - 2) <= 3][:16]
+        evolve = Evolve(trainer, genes_per_gen=16, dedup=True)
+        evolve.clone_limit = 50
+        # children that behave just like their parents
+        evolve.mutate = lambda w1, w2: (Gene(trainer, w1.gene),) * 2
+
+        next_gen = []
+        thread = threading.Thread(
+            target=lambda: next_gen.extend(evolve.offspring(generation)),
+            daemon=True)
+        thread.start()
+        thread.join(30)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(next_gen), 16)
+        self.assertTrue(all(g.fitness() < 3 for g in next_gen))
+
+    def test_solved(self):
+        """Test a generation is over as soon as it has a solution"""
+        trainer = Match('', '\x05\x02')
+        generation = [Gene(trainer, '+' * n + '.') for n in range(8)]
+        evolve = Evolve(trainer, genes_per_gen=8, dedup=True)
+        evolve.mutate = lambda w1, w2: (Gene(trainer, '+++++.---.'),) * 2
+        next_gen = evolve.offspring(generation)
+        self.assertEqual(len(next_gen), 3)
+        self.assertEqual(next_gen[0].gene, '+++++.---.')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from unittest import TestCase
+
+from benchmarks import bench
+from benchmarks.corpus import INPUT, PROGRAMS
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.compiler import CompiledEmulator
+
+
+class TestCorpus(TestCase):
+    """Test the programs benchmarks are run on"""
+
+    def test_engines_agree(self):
+        """Test every engine does the same work on every program"""
+        for name, code in PROGRAMS.items():
+            interpreted = BrainfuckEmulator(code, INPUT, 100_000)
+            compiled = CompiledEmulator(code, INPUT, 100_000)
+            self.assertEqual(interpreted.run(), compiled.run(), name)
+            self.assertEqual(interpreted.cycles, compiled.cycles, name)
+
+
+class TestBench(TestCase):
+    """Test the benchmark harness"""
+
+    def test_measure(self):
+        """Test the best rate of any repeat is kept"""
+        runs = iter([(10, 0.1), (10, 0.1), (30, 0.2), (40, 0.3)])
+        benchmark = bench.Benchmark('test', 'things/s', lambda: next(runs))
+        self.assertEqual(bench.measure(benchmark, repeat=2, min_time=0.2),
+                         150)
+
+    def test_regressions(self):
+        """Test only rates well below their baseline are regressions"""
+        rates = {'a': 70, 'b': 90, 'c': 200, 'new': 1}
+        baseline = {'a': 100, 'b': 100, 'c': 100}
+        self.assertEqual(bench.regressions(rates, baseline, 0.2), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
+import itertools
 import unittest
 from unittest import TestCase
 
-from gp.brainfuck_machine import BrainfuckEmulator
+from gp.brainfuck_machine import BrainfuckEmulator, Tape
 
 
 class TestBFMRun(TestCase):
@@ -28,6 +29,59 @@ class TestBFMRun(TestCase):
         """Test taking input"""
         self.assertEqual(BrainfuckEmulator(',+.', 'A', 10).run(), 'B')
 
+    def test_infinite_loop(self):
+        """Test a loop that never changes state is skipped over"""
+        e = BrainfuckEmulator('+[]', '', 100_000)
+        self.assertEqual(e.run(), '')
+        self.assertTrue(e.in_infinite_loop)
+        self.assertEqual(e.cycles, 100_001)
+
+    def test_infinite_output(self):
+        """Test skipping an infinite loop keeps all of its output"""
+        e = BrainfuckEmulator('+[.]', '', 100_000)
+        self.assertEqual(e.run(), '\x01' * 33_333)
+        self.assertTrue(e.in_infinite_loop)
+        self.assertEqual((e.cycles, e.state.pptr), (100_001, 2))
+
+    def test_finite_loop(self):
+        """Test loops that terminate aren't mistaken for infinite ones"""
+        e = BrainfuckEmulator('++[>+<-]>.', '', 1000)
+        self.assertEqual(e.run(), '\x02')
+        self.assertFalse(e.in_infinite_loop)
+
+
+class TestBFMStream(TestCase):
+    """Test the function `BrainfuckEmulator.stream()`"""
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(list(BrainfuckEmulator('', '', 10).stream()), [])
+
+    def test_characters(self):
+        """Test output is produced one character at a time"""
+        self.assertEqual(list(BrainfuckEmulator(',.+.', 'A', 10).stream()),
+                         ['A', 'B'])
+
+    def test_stop_early(self):
+        """Test the program stops when the consumer does"""
+        e = BrainfuckEmulator('+[.+]', '', 100_000)
+        self.assertEqual(next(e.stream()), '\x01')
+        self.assertEqual(e.cycles, 3)
+
+    def test_stop_infinite_output(self):
+        """Test infinite loops that produce output stop with the consumer"""
+        e = BrainfuckEmulator('+[.]', '', 100_000)
+        self.assertEqual(list(itertools.islice(e.stream(), 3)), ['\x01'] * 3)
+        self.assertEqual(len(e.out), 3)
+        self.assertLess(e.cycles, 100)
+
+    def test_resume(self):
+        """Test running a stopped program finishes it"""
+        e = BrainfuckEmulator('.+.+.', '', 10)
+        next(e.stream())
+        self.assertEqual(e.run(), '\x00\x01\x02')
+        self.assertEqual(e.cycles, 5)
+
 
 class TestBFMLoopMap(TestCase):
     """Test the function `gene.loop_map(gene)`"""
@@ -49,5 +103,41 @@ class TestBFMLoopMap(TestCase):
                          {48: 8, 33: 14, 8: 48, 43: 45, 45: 43, 14: 33})
 
 
+class TestTape(TestCase):
+    """Test the class `Tape`"""
+
+    def test_unwritten_cells(self):
+        """Test cells that were never written read as zero"""
+        tape = Tape(size=4, origin=2)
+        self.assertEqual((tape[-100], tape[100]), (0, 0))
+        self.assertEqual(len(tape), 4)
+
+    def test_grow_left(self):
+        """Test positions are stable when the tape grows to the left"""
+        tape = Tape(size=4, origin=2)
+        tape[1] = 7
+        tape[-10] = 3
+        self.assertEqual((tape[1], tape[-10]), (7, 3))
+        self.assertGreaterEqual(len(tape), 12)
+
+    def test_wraparound(self):
+        """Test fixed width cells wrap around"""
+        tape = Tape(cell_bits=8)
+        tape[0] = -1
+        tape[1] = 256
+        self.assertEqual((tape[0], tape[1]), (255, 0))
+
+    def test_unbounded(self):
+        """Test cells don't wrap by default"""
+        tape = Tape()
+        tape[0] = -1
+        self.assertEqual(tape[0], -1)
+
+    def test_not_shared(self):
+        """Test emulators each get their own tape"""
+        BrainfuckEmulator('+++', '', 10).run()
+        self.assertEqual(BrainfuckEmulator('.', '', 10).run(), '\x00')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest import TestCase
+
+from gp import cache
+from gp.cache import FitnessCache
+
+
+class TestCanonical(TestCase):
+    """Test the function `cache.canonical(code)`"""
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(cache.canonical(''), '')
+
+    def test_pairs(self):
+        """Test commands that undo each other are removed"""
+        self.assertEqual(cache.canonical('+-.-+><<>.'), '..')
+
+    def test_nested_pairs(self):
+        """Test removing a pair can expose another"""
+        self.assertEqual(cache.canonical('.+<>-.'), '..')
+
+    def test_dead_loops(self):
+        """Test empty loops that can't be entered are removed"""
+        self.assertEqual(cache.canonical('[][.][]'), '[.]')
+
+    def test_live_loops(self):
+        """Test empty loops that might never end are kept"""
+        self.assertEqual(cache.canonical('+[]'), '+[]')
+
+
+class TestFitnessCache(TestCase):
+    """Test the class `FitnessCache`"""
+
+    def test_equivalent_programs(self):
+        """Test programs with the same canonical form share an entry"""
+        c = FitnessCache()
+        c.put(None, '+.', ('\x01', 5, 2))
+        self.assertEqual(c.get(None, '+<>.'), ('\x01', 5, 2))
+        self.assertIsNone(c.get(None, '+..'))
+        self.assertEqual((c.hits, c.misses), (1, 1))
+
+    def test_eviction(self):
+        """Test the least recently used entry is evicted"""
+        c = FitnessCache(max_entries=2)
+        c.put(None, '.', ('', 0, 1))
+        c.put(None, '+.', ('', 1, 2))
+        c.get(None, '.')
+        c.put(None, '++.', ('', 2, 3))
+        self.assertEqual(len(c), 2)
+        self.assertEqual(c.evictions, 1)
+        self.assertIsNone(c.get(None, '+.'))
+        self.assertIsNotNone(c.get(None, '.'))
+
+
+if __name__ == '__main__':
+    unittest.main()
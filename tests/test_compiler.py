@@ -0,0 +1,129 @@
+import itertools
+import unittest
+from unittest import TestCase
+
+from gp import compiler
+from gp.compiler import CompiledEmulator
+
+
+class TestCompileProgram(TestCase):
+    """Test the function `compiler.compile_program(code)`"""
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(compiler.compile_program(''), [])
+
+    def test_fold(self):
+        """Test runs of commands are folded together"""
+        ops = compiler.compile_program('+++-->><')
+        self.assertEqual([(op.kind, op.arg, op.size) for op in ops],
+                         [(compiler.ADD, 1, 5), (compiler.MOVE, 1, 3)])
+
+    def test_clear(self):
+        """Test clear loops are recognized"""
+        self.assertEqual(compiler.compile_program('[-]')[0].kind,
+                         compiler.CLEAR)
+
+    def test_mul(self):
+        """Test multiply loops are recognized"""
+        op = compiler.compile_program('[->++>+++<<]')[0]
+        self.assertEqual((op.kind, op.arg, op.step),
+                         (compiler.MUL, ((1, 2), (2, 3)), -1))
+
+    def test_scan(self):
+        """Test scan loops are recognized"""
+        op = compiler.compile_program('[<<]')[0]
+        self.assertEqual((op.kind, op.step), (compiler.SCAN, -2))
+
+    def test_nested(self):
+        """Test loops containing other loops are left alone"""
+        kinds = [op.kind for op in compiler.compile_program('[>[-]<-]')]
+        self.assertEqual(kinds, [compiler.OPEN, compiler.MOVE, compiler.CLEAR,
+                                 compiler.MOVE, compiler.ADD, compiler.CLOSE])
+
+
+class TestCompiledEmulatorRun(TestCase):
+    """Test the function `CompiledEmulator.run()`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.hello_world = '++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]' \
+                           '>>.>---.+++++++..+++.>>.<-.<.+++.------.--------.' \
+                           '>>+.>++.'
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(CompiledEmulator('', '', 10).run(), '')
+
+    def test_hello_world(self):
+        """Test Wikipedia's `Hello world!` program"""
+        e = CompiledEmulator(self.hello_world, '', 1000)
+        self.assertEqual(e.run(), 'Hello World!\n')
+        self.assertEqual(e.cycles, 969)
+
+    def test_input(self):
+        """Test taking input"""
+        self.assertEqual(CompiledEmulator(',+.', 'A', 10).run(), 'B')
+
+    def test_cycles(self):
+        """Test fused loops are charged what the interpreter would run"""
+        e = CompiledEmulator('+++[->++<]>.', '', 100)
+        self.assertEqual(e.run(), '\x06')
+        self.assertEqual(e.cycles, 3 + 3 * 7 + 2)
+
+    def test_max_iter(self):
+        """Test running out of cycles part way through a fused op"""
+        e = CompiledEmulator('+++[->++<]>.', '', 10)
+        self.assertEqual(e.run(), '')
+        self.assertEqual((e.cycles, e.state.pptr), (11, 4))
+
+    def test_stream_resume(self):
+        """Test a stopped program carries on from where it stopped"""
+        e = CompiledEmulator('++[>+++[-]<-]+[.+]', '', 1000)
+        self.assertEqual(next(e.stream()), '\x01')
+        self.assertEqual(e.cycles, 39)
+        self.assertEqual(e.run(), CompiledEmulator(e.code, '', 1000).run())
+
+    def test_stop_infinite_output(self):
+        """Test infinite loops that produce output stop with the consumer"""
+        e = CompiledEmulator('+[.]', '', 100_000)
+        self.assertEqual(list(itertools.islice(e.stream(), 3)), ['\x01'] * 3)
+        self.assertEqual(len(e.out), 3)
+        self.assertLess(e.cycles, 100)
+
+    def test_infinite_output(self):
+        """Test skipping an infinite loop keeps all of its output"""
+        e = CompiledEmulator('+[.]', '', 100_000)
+        self.assertEqual(e.run(), '\x01' * 33_333)
+        self.assertTrue(e.in_infinite_loop)
+        self.assertEqual((e.cycles, e.state.pptr), (100_001, 2))
+
+    def test_infinite_clear(self):
+        """Test clear loops that never reach zero use up the budget"""
+        e = CompiledEmulator('-[-].', '', 1000)
+        self.assertEqual(e.run(), '')
+        self.assertEqual(e.cycles, 1001)
+
+    def test_snapshots(self):
+        """Test snapshots are taken outside of loops, spaced out"""
+        e = CompiledEmulator('+' * 40 + '.[-]' + '>' * 40 + '.', '', 1000)
+        e.snapshots = []
+        e.run()
+        self.assertEqual([(s.pptr, s.cycles) for s in e.snapshots],
+                         [(40, 40), (44, 161), (84, 201)])
+
+    def test_restore(self):
+        """Test a program picks up from the snapshot of a similar one"""
+        e = CompiledEmulator(self.hello_world, '', 1000)
+        e.snapshots = []
+        e.run()
+        code = self.hello_world[:-4] + '+.'
+        resumed = CompiledEmulator(code, '', 1000)
+        resumed.restore(e.snapshots[-1])
+        fresh = CompiledEmulator(code, '', 1000)
+        self.assertEqual(resumed.run(), fresh.run())
+        self.assertEqual(resumed.cycles, fresh.cycles)
+
+
+if __name__ == '__main__':
+    unittest.main()
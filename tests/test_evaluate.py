@@ -0,0 +1,56 @@
+import unittest
+from unittest import TestCase
+
+from gp.evaluate import ProcessEvaluator, SerialEvaluator, ThreadEvaluator
+from gp.gene import Gene
+from gp.trainer import Hello
+
+
+class TestEvaluate(TestCase):
+    """Test the function `Evaluator.evaluate(trainer, genes)`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.trainer = Hello()
+        self.codes = ['', '+.', '++[>+++<-]>.', ',[.]', '+' * 72 + '.']
+        self.expected = [Gene(self.trainer, c).fitness() for c in self.codes]
+        self.hello = '++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]' \
+                     '>>.>---.+++++++..+++.>>.<-.<.+++.------.--------.>>+.>++.'
+
+    def check(self, evaluator):
+        genes = [Gene(self.trainer, c) for c in self.codes]
+        try:
+            self.assertEqual(evaluator.evaluate(self.trainer, genes),
+                             self.expected)
+        finally:
+            evaluator.close()
+        self.assertTrue(all(g.evaluated for g in genes))
+        self.assertEqual([g.fitness() for g in genes], self.expected)
+
+    def test_serial(self):
+        self.check(SerialEvaluator())
+
+    def test_threads(self):
+        self.check(ThreadEvaluator(2, chunks_per_worker=1))
+
+    def test_processes(self):
+        self.check(ProcessEvaluator(2))
+
+    def test_threshold(self):
+        """Test genes that can't get below a threshold are stopped early"""
+        Gene.cache.clear()
+        codes = ['+[.]', '+' * 72 + '.', self.hello]
+        genes = [Gene(self.trainer, c) for c in codes]
+        fitnesses = SerialEvaluator().evaluate(self.trainer, genes, 1000)
+        self.assertFalse(genes[0].evaluated)
+        self.assertGreaterEqual(fitnesses[0], 1000)
+        self.assertEqual(fitnesses[1:], [109105, 32])
+        self.assertGreater(genes[0].fitness(), fitnesses[0])
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(ProcessEvaluator(2).evaluate(self.trainer, []), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
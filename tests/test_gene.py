@@ -0,0 +1,130 @@
+import random
+import unittest
+from unittest import TestCase
+
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.gene import Gene
+from gp.trainer import Hello, Match, Reverse, Suite
+
+
+class TestGeneRun(TestCase):
+    """Test the function `Gene.run()`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.trainer = Hello()
+        self.parent = Gene(self.trainer,
+                           '++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]'
+                           '>>.>---.+++++++..+++.>>.<-.<.+++.------.--------.')
+
+    def test_lineage(self):
+        """Test a child picks up from where its parent's code changes"""
+        self.parent.run()
+        self.assertTrue(self.parent.snapshots)
+
+        code = self.parent.gene[:60] + '+' + self.parent.gene[60:]
+        child = Gene(self.trainer, code, self.parent)
+        self.assertTrue(child.snapshots)
+        self.assertTrue(all(s.pptr <= 60 for s in child.snapshots))
+
+        fresh = Gene(self.trainer, code)
+        self.assertEqual(child.run(), fresh.run())
+        self.assertEqual(child.cycles, fresh.cycles)
+
+    def test_edit(self):
+        """Test an edit before every snapshot leaves nothing to resume"""
+        self.parent.run()
+        child = Gene(self.trainer, self.parent.gene, self.parent, 0)
+        self.assertEqual(child.snapshots, [])
+
+
+class TestGeneCases(TestCase):
+    """Test running genes on trainers with many cases"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        Gene.cache.clear()
+        self.cases = [Match('AB', 'BC'), Match('a', 'bb'), Match('', '')]
+        self.trainer = Suite(self.cases)
+        self.code = ',+.,+.'
+
+    def test_fitness(self):
+        """Test the fitness is the sum over all cases"""
+        g = Gene(self.trainer, self.code)
+        self.assertEqual(g.fitness(), 0 + 1 + 0)
+        self.assertEqual(g.output(), 'BC')
+        self.assertEqual(g.cycles, None)
+
+    def test_threshold(self):
+        """Test cases after the one that reaches the threshold aren't run"""
+        g = Gene(self.trainer, '+' * 100 + '.')
+        self.assertEqual(g.run(100), None)
+        self.assertGreaterEqual(g.bound, 100)
+        self.assertEqual(self.trainer.stops[self.cases[0]], 1)
+        self.assertEqual(self.trainer.cases()[0], self.cases[0])
+
+    def test_no_cases(self):
+        """Test a trainer without cases is refused, rather than solved"""
+        with self.assertRaises(ValueError):
+            Gene(Suite([]), '+.').run()
+
+    def test_reordered_snapshots(self):
+        """Test snapshots aren't resumed on another case's input"""
+        trainer = Reverse()
+        parent = Gene(trainer, ',>,[[-]]<' + '>' * 40 + '<' * 40 + '.')
+        parent.run()
+        self.assertTrue(parent.snapshots)
+
+        # the first case changes once genes are stopped on another
+        hello = [c for c in trainer.cases() if c.gen_in() == 'hello'][0]
+        for _ in range(3):
+            trainer.stopped_at(hello)
+        self.assertIs(trainer.cases()[0], hello)
+
+        child = Gene(trainer, parent.gene[:-1] + '+.', parent)
+        fresh = Gene(trainer, child.gene)
+        self.assertEqual(child.run(), fresh.run())
+        self.assertEqual(child.output(), fresh.output())
+        self.assertTrue(all(s.input_string == 'hello'
+                            for s in child.snapshots))
+
+
+class TestGeneGen(TestCase):
+    """Test the function `Gene.gen(mu, sigma, length)`"""
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(Gene.gen(length=-1), '')
+
+    def test_valid(self):
+        """Test generated programs have balanced brackets"""
+        random.seed(0)
+        for _ in range(100):
+            code = Gene.gen(350, 75)
+            BrainfuckEmulator._loop_map(code)
+            self.assertEqual(code.count('['), code.count(']'))
+
+
+class TestGeneRepair(TestCase):
+    """Test the function `Gene.repair(code)`"""
+
+    def test_valid(self):
+        """Test valid programs are left alone"""
+        self.assertEqual(Gene.repair('+[>[-]<]'), '+[>[-]<]')
+
+    def test_unbalanced(self):
+        """Test stray `]` are dropped and open `[` closed"""
+        self.assertEqual(Gene.repair(']+[[>]'), '+[[>]]')
+
+
+class TestGeneSlots(TestCase):
+    """Test genes keep their attributes in slots"""
+
+    def test_slots(self):
+        g = Gene(Hello(), '+.')
+        self.assertFalse(hasattr(g, '__dict__'))
+        self.assertEqual(g.fitness(), Gene(Hello(), '+.').fitness())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import random
+import unittest
+from unittest import TestCase
+
+from gp.gene import Gene
+from gp.generate import DonorPool, generate
+
+
+class TestGenerate(TestCase):
+    """Test the function `generate.generate(k, mu, sigma)`"""
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(generate(0, 10, 1), [])
+        self.assertEqual(generate(3, -10, 1), ['', '', ''])
+
+    def test_valid(self):
+        """Test generated programs have balanced brackets"""
+        random.seed(0)
+        for code in generate(200, 350, 75):
+            self.assertEqual(Gene.repair(code), code)
+
+    def test_seeded(self):
+        """Test seeding `random` makes the programs repeatable"""
+        random.seed(1)
+        first = generate(10, 50, 10)
+        random.seed(1)
+        self.assertEqual(generate(10, 50, 10), first)
+
+
+class TestDonorPool(TestCase):
+    """Test the class `DonorPool`"""
+
+    def test_refill(self):
+        """Test the pool generates more programs once it runs out"""
+        pool = DonorPool(20, 5, batch=3)
+        codes = [pool.draw() for _ in range(7)]
+        self.assertEqual(len(codes), 7)
+        self.assertTrue(all(Gene.repair(c) == c for c in codes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import queue
+import threading
+import unittest
+from unittest import TestCase
+
+from gp.evolve import Evolve
+from gp.gene import Gene
+from gp.islands import Islands, island
+from gp.trainer import Match
+
+
+class TestIslands(TestCase):
+    """Test the class `Islands`"""
+
+    def test_solution(self):
+        """Test the first solution found by any island is returned"""
+        trainer = Match('', '')
+        code = Islands(trainer, islands=2, genes_per_gen=4) \
+            .generate_solution()
+        self.assertEqual(Gene(trainer, code).fitness(), 0)
+
+    def test_migration(self):
+        """Test islands send their best genes on, and take in others'"""
+        trainer = Match('', 'Hi')
+        hi = '+' * 72 + '.' + '+' * 33 + '.'
+        inbox, outbox, solutions = queue.Queue(), queue.Queue(), queue.Queue()
+        inbox.put([hi])
+        solved = threading.Event()
+
+        island(0, trainer, 8, 1, 2, inbox, outbox, solved, solutions, 0)
+        self.assertEqual(len(outbox.get_nowait()), 2)
+        self.assertTrue(solved.is_set())
+        self.assertEqual(solutions.get_nowait(), (0, hi))
+
+    def test_stop(self):
+        """Test islands stop once another island has solved the problem"""
+        trainer = Match('', 'Hello world!')
+        inbox, outbox, solutions = queue.Queue(), queue.Queue(), queue.Queue()
+        solved = threading.Event()
+        timer = threading.Timer(0.5, solved.set)
+        timer.start()
+
+        thread = threading.Thread(target=island,
+                                  args=(0, trainer, 8, 1, 2, inbox, outbox,
+                                        solved, solutions, 0))
+        thread.start()
+        thread.join(30)
+        timer.cancel()
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(solutions.empty())
+        self.assertFalse(outbox.empty())
+
+    def test_immigrate(self):
+        """Test immigrants take the place of worse genes only"""
+        trainer = Match('', '\x02')
+        evolve = Evolve(trainer, genes_per_gen=3)
+        generation = [Gene(trainer, c) for c in ('+.', '.', '+++.')]
+        evolve.evaluator.evaluate(trainer, generation)
+
+        generation = evolve.immigrate(generation, ['++.', '++++++.'])
+        self.assertEqual([g.gene for g in generation], ['++.', '+.', '+++.'])
+        self.assertEqual([g.fitness() for g in generation], [0, 1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import io
+import json
+import random
+import unittest
+from unittest import TestCase
+
+from gp import metrics
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.evolve import Evolve
+from gp.metrics import CallbackSink, GenerationRecord, JsonLinesSink
+from gp.trainer import Match
+
+
+class TestCountRun(TestCase):
+    """Test the function `count_run`"""
+
+    def setUp(self):
+        """Start counting from nothing"""
+        self.events = metrics.events.copy()
+        metrics.events.clear()
+
+    def tearDown(self):
+        """Put back what was counted before"""
+        metrics.events.clear()
+        metrics.events.update(self.events)
+
+    def test_finished(self):
+        """Test runs that finish aren't counted"""
+        emulator = BrainfuckEmulator('+++.', '', max_iter=100)
+        emulator.run()
+        metrics.count_run(emulator)
+        self.assertEqual(sum(metrics.events.values()), 0)
+
+    def test_timeout(self):
+        """Test runs out of cycles are counted as timeouts"""
+        emulator = BrainfuckEmulator('+[.+]', '', max_iter=100)
+        emulator.run()
+        metrics.count_run(emulator)
+        self.assertEqual(metrics.events[metrics.TIMEOUTS], 1)
+        self.assertEqual(metrics.events[metrics.INFINITE_LOOPS], 0)
+
+    def test_infinite_loop(self):
+        """Test runs stuck in a loop are counted as infinite loops"""
+        emulator = BrainfuckEmulator('+[]', '', max_iter=100)
+        emulator.run()
+        metrics.count_run(emulator)
+        self.assertEqual(metrics.events[metrics.INFINITE_LOOPS], 1)
+        self.assertEqual(metrics.events[metrics.TIMEOUTS], 0)
+
+
+class TestJsonLinesSink(TestCase):
+    """Test the class `JsonLinesSink`"""
+
+    def test_record(self):
+        """Test every record is written as a line of JSON"""
+        file = io.StringIO()
+        sink = JsonLinesSink(file)
+        for n in range(2):
+            sink.record(GenerationRecord(n, 10, 1000, 1, 2, 3, 4, 0.1, 0.1,
+                                         0.2, 0.5, 7, 9.5))
+        sink.close()
+
+        lines = file.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        record = json.loads(lines[1])
+        self.assertEqual(record['generation'], 1)
+        self.assertEqual(record['median'], 9.5)
+        self.assertIsNone(record['best_gene'])
+        self.assertFalse(file.closed)
+
+
+class TestReport(TestCase):
+    """Test `Evolve` sends the record of every generation to its sinks"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        random.seed(0)
+        self.evolve = Evolve(Match('', 'Hi'), genes_per_gen=8)
+
+    def evolve_records(self, details=False):
+        """Records of generation zero and two generations after it"""
+        records = []
+        self.evolve.add_sink(CallbackSink(records.append, details))
+        generation = self.evolve.generation_zero()
+        self.evolve.report(0, generation)
+        for n in range(1, 3):
+            generation = self.evolve.offspring(generation)
+            self.evolve.report(n, generation)
+        return records, generation
+
+    def test_records(self):
+        """Test a record is made of every generation"""
+        records, generation = self.evolve_records()
+        self.assertEqual([r.generation for r in records], [0, 1, 2])
+        for record in records:
+            self.assertGreater(record.evaluations, 0)
+            self.assertGreaterEqual(record.wall_time,
+                                    record.select_time + record.mutate_time
+                                    + record.evaluate_time)
+            self.assertLessEqual(record.best, record.median)
+            self.assertIsNone(record.best_gene)
+        self.assertEqual(records[-1].best,
+                         min(g.fitness() for g in generation))
+
+    def test_details(self):
+        """Test the best gene is only recorded if a sink wants it"""
+        records, generation = self.evolve_records(details=True)
+        best = min(generation, key=lambda x: x.fitness())
+        self.assertEqual(records[-1].best_gene, best.gene)
+        self.assertIsNotNone(records[-1].best_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
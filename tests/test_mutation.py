@@ -0,0 +1,75 @@
+import random
+import unittest
+from unittest import TestCase
+
+from gp import mutation
+from gp.brainfuck_machine import BrainfuckEmulator
+from gp.gene import Gene
+from gp.mutation import BracketIndex
+
+
+class TestBracketIndex(TestCase):
+    """Test the class `BracketIndex`"""
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        index = BracketIndex('')
+        self.assertEqual(index.segment(10), (0, 0))
+        self.assertEqual(index.cut(0), 0)
+        self.assertEqual(index.cut(1), -1)
+
+    def test_depth(self):
+        """Test the depth of every position is counted"""
+        index = BracketIndex('+[>[-]]')
+        self.assertEqual(index.depth, [0, 0, 1, 1, 2, 2, 1, 0])
+        self.assertEqual(index.at_depth[2], [4, 5])
+
+    def test_segment(self):
+        """Test segments take in whole loops only"""
+        random.seed(0)
+        index = BracketIndex('+[>[-]<]+[.]')
+        for _ in range(100):
+            start, end = index.segment(6)
+            self.assertLessEqual(end - start, 6)
+            self.assertEqual(index.depth[start], index.depth[end])
+            self.assertGreaterEqual(min(index.depth[start:end + 1]),
+                                    index.depth[start])
+
+
+class TestOperators(TestCase):
+    """Test every mutation operator keeps programs valid"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        random.seed(0)
+        self.codes = [Gene.gen(100, 25) for _ in range(50)] + ['', '[[]]']
+
+    def check(self, original, mutated, edit):
+        BrainfuckEmulator._loop_map(mutated)  # raises if unbalanced
+        self.assertEqual(mutated.count('['), mutated.count(']'))
+        self.assertEqual(original[:edit], mutated[:edit])
+
+    def test_single(self):
+        for operator in (mutation.deletion, mutation.duplication,
+                         mutation.inversion, mutation.complementation):
+            for code in self.codes:
+                self.check(code, *operator(BracketIndex(code), 10))
+
+    def test_pairs(self):
+        for code1, code2 in zip(self.codes, reversed(self.codes)):
+            i1, i2 = BracketIndex(code1), BracketIndex(code2)
+            for children in (mutation.translocation(i1, i2),
+                             mutation.insertion(i1, i2, 10)):
+                self.check(code1, *children[0])
+                self.check(code2, *children[1])
+
+    def test_inversion(self):
+        """Test loops stay the right way around"""
+        random.seed(1)
+        index = BracketIndex('+[>.]-')
+        results = {mutation.inversion(index, 5)[0] for _ in range(200)}
+        self.assertIn('[.>]+-', results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import random
+import threading
+import unittest
+from unittest import TestCase
+
+from gp.evaluate import ThreadEvaluator
+from gp.gene import Gene
+from gp.pipeline import PipelineEvolve
+from gp.trainer import Hello, Match
+
+
+class TestPipelineEvolve(TestCase):
+    """Test the class `PipelineEvolve`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        random.seed(0)
+        self.trainer = Hello()
+        self.generation = [Gene(self.trainer, c)
+                           for c in ('+' * 72 + '.', '+' * 60 + '.', '+.')
+                           * 2]
+
+    def check(self, evolve):
+        next_gen = evolve.offspring(list(self.generation))
+        worst = max(g.fitness() for g in self.generation)
+        self.assertEqual(len(next_gen), 6)
+        self.assertEqual(next_gen[:2], sorted(
+            self.generation, key=lambda x: x.fitness())[:2])
+        self.assertTrue(all(g.fitness() < worst for g in next_gen[2:]))
+        self.assertTrue(all(g.evaluated for g in next_gen))
+
+    def test_offspring(self):
+        """Test every child admitted beats the worst of the generation"""
+        self.check(PipelineEvolve(self.trainer, genes_per_gen=6))
+
+    def test_offspring_pool(self):
+        """Test children can be evaluated on a pool of workers"""
+        evolve = PipelineEvolve(self.trainer, genes_per_gen=6,
+                                evaluator=ThreadEvaluator(2),
+                                consumers=3, queue_size=4)
+        try:
+            self.check(evolve)
+        finally:
+            evolve.evaluator.close()
+
+    def test_stop_when_full(self):
+        """Test no children are evaluated once the generation is full"""
+        evolve = PipelineEvolve(self.trainer, genes_per_gen=6, consumers=3,
+                                queue_size=2)
+        generations = []
+        wasted = []
+        admit, evaluate_async = evolve.admit, evolve.evaluator.evaluate_async
+
+        def admit_tracked(generation, g, **kwargs):
+            generations.append(generation)
+            return admit(generation, g, **kwargs)
+
+        async def evaluate_tracked(*args, **kwargs):
+            if generations and len(generations[-1]) >= evolve.per_gen:
+                wasted.append(args[1])
+            return await evaluate_async(*args, **kwargs)
+
+        evolve.admit = admit_tracked
+        evolve.evaluator.evaluate_async = evaluate_tracked
+        generation = list(self.generation)
+        for _ in range(5):
+            generation = evolve.offspring(generation)
+            generations.clear()
+        self.assertEqual(wasted, [])
+
+    def test_leave_running(self):
+        """Test a full generation doesn't wait on evaluations still going"""
+        evolve = PipelineEvolve(self.trainer, genes_per_gen=6)
+        release = threading.Event()
+        finished = []
+        run = evolve.evaluator._run
+
+        def run_blocked(*args):
+            # the first batch is held up until the generation is over
+            if not finished:
+                finished.append(False)
+                release.wait(2)
+                finished[0] = True
+            return run(*args)
+
+        evolve.evaluator._run = run_blocked
+        try:
+            next_gen = evolve.offspring(list(self.generation))
+            self.assertEqual(finished, [False])
+            self.assertEqual(len(next_gen), 6)
+        finally:
+            release.set()
+            evolve.close()
+
+    def test_solved(self):
+        """Test a generation is over as soon as it has a solution"""
+        trainer = Match('', '\x05\x02')
+        generation = [Gene(trainer, '+' * n + '.') for n in range(8)]
+        evolve = PipelineEvolve(trainer, genes_per_gen=8, dedup=True)
+        evolve.mutate = lambda w1, w2: (Gene(trainer, '+++++.---.'),) * 2
+        next_gen = evolve.offspring(generation)
+        self.assertEqual(len(next_gen), 3)
+        self.assertEqual(next_gen[0].gene, '+++++.---.')
+
+    def test_producer_error(self):
+        """Test an error while breeding isn't left waiting on forever"""
+        evolve = PipelineEvolve(self.trainer, genes_per_gen=6)
+        evolve.mutate = None
+        with self.assertRaises(TypeError):
+            evolve.offspring(list(self.generation))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import os
+import pstats
+import random
+import tempfile
+import unittest
+from unittest import TestCase
+
+from gp.compiler import CompiledEmulator
+from gp.evolve import Evolve
+from gp.gene import Gene
+from gp.profiling import Profiler, ProfilingEmulator
+from gp.trainer import Match
+
+
+class TestProfilingEmulator(TestCase):
+    """Test the class `ProfilingEmulator`"""
+
+    def setUp(self):
+        """Start counting from nothing"""
+        ProfilingEmulator.opcodes.clear()
+        ProfilingEmulator.loops.clear()
+
+    def test_same_as_compiled(self):
+        """Test runs end the same way as on `CompiledEmulator`"""
+        for code in ('++[>+++<-]>.', '+[.+]', '+[]', '+[>,.<]'):
+            expected = CompiledEmulator(code, 'abc', 1000)
+            emulator = ProfilingEmulator(code, 'abc', 1000)
+            self.assertEqual(emulator.run(), expected.run())
+            self.assertEqual(emulator.cycles, expected.cycles)
+
+    def test_counts(self):
+        """Test every command and every loop's brackets are counted"""
+        ProfilingEmulator('++[>+++<-]>.', '', 1000).run()
+        self.assertEqual(ProfilingEmulator.opcodes['+'], 8)
+        self.assertEqual(ProfilingEmulator.opcodes['['], 2)
+        self.assertEqual(ProfilingEmulator.opcodes[']'], 2)
+        self.assertEqual(ProfilingEmulator.opcodes['.'], 1)
+        self.assertEqual(ProfilingEmulator.loops, {'[>+++<-]': 4})
+
+
+class TestProfiler(TestCase):
+    """Test the class `Profiler`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        random.seed(0)
+        self.cache, Gene.cache = Gene.cache, None
+        self.evolve = Evolve(Match('', 'Hi'), genes_per_gen=8)
+        self.stream = io.StringIO()
+        self.path = os.path.join(tempfile.mkdtemp(), 'gp.prof')
+
+    def tearDown(self):
+        """Put back the cache"""
+        Gene.cache = self.cache
+
+    def test_profile(self):
+        """Test a few generations are profiled, and put back afterwards"""
+        profiler = Profiler(self.path, self.stream)
+        self.evolve.add_sink(profiler)
+        with profiler:
+            self.assertIs(Gene.engine, ProfilingEmulator)
+            generation = self.evolve.generation_zero()
+            self.evolve.report(0, generation)
+            generation = self.evolve.offspring(generation)
+            self.evolve.report(1, generation)
+        self.assertIs(Gene.engine, CompiledEmulator)
+
+        summary = self.stream.getvalue()
+        self.assertIn('Phases over 2 generations:', summary)
+        self.assertIn('evaluate', summary)
+        self.assertGreater(sum(ProfilingEmulator.opcodes.values()), 0)
+
+        stats = pstats.Stats(self.path)
+        self.assertTrue(any(name == 'offspring'
+                            for _, _, name in stats.stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
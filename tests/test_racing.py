@@ -0,0 +1,107 @@
+import unittest
+from unittest import TestCase
+
+from gp.cache import FitnessCache
+from gp.evaluate import score
+from gp.gene import Gene
+from gp.profiling import ProfilingEmulator
+from gp.racing import Race, RacingEvaluator
+from gp.trainer import Hello, Match, Reverse
+
+
+class TestRace(TestCase):
+    """Test the class `Race`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.codes = ['', '+.', '++[>+++<-]>.', ',[.,]', '+[]', ',[.>,]<[.<]',
+                      '+' * 72 + '.' + '+' * 29 + '.', '+[.+]', '>,[>,]<[.<]']
+
+    def check(self, trainer_type, threshold=None):
+        for code in self.codes:
+            trainer = trainer_type()
+            expected = score(trainer, [Gene(trainer, code)], threshold)
+            trainer = trainer_type()
+            race = Race(Gene(trainer, code), trainer, 10_000)
+            budget = 3
+            while not race.done:
+                race.advance(budget, threshold)
+                budget *= 2
+            self.assertEqual(race.result(), expected[0], code)
+
+    def test_resume(self):
+        """Test a run resumed with ever bigger budgets is like one run"""
+        self.check(Hello)
+        self.check(Reverse)
+
+    def test_resume_threshold(self):
+        self.check(Hello, 100)
+        self.check(Reverse, 60)
+
+    def test_infinite_loop(self):
+        """Test a loop found in one round is skipped in the next ones too"""
+        ProfilingEmulator.opcodes.clear()
+        engine, Gene.engine = Gene.engine, ProfilingEmulator
+        try:
+            trainer = Match('', 'AB')
+            # a loop that is too much for `analyze`, then one that never ends
+            race = Race(Gene(trainer, '+[-[.]]+[]'), trainer, 1_000_000)
+            budget = 50
+            while not race.done:
+                race.advance(budget)
+                budget *= 2
+        finally:
+            Gene.engine = engine
+        self.assertEqual(race.result(), ('', 8581, 1_000_001))
+        self.assertLess(sum(ProfilingEmulator.opcodes.values()), 1000)
+
+
+class TestRacingEvaluator(TestCase):
+    """Test the class `RacingEvaluator`"""
+
+    def test_halving(self):
+        """Test genes dropped from the race keep the fitness they had"""
+        trainer = Match('', 'AB')
+        # a loop that is too much for `analyze`, so the genes are run
+        prefix = '+[-[.]]'
+        genes = [Gene(trainer, c) for c in (prefix + '+' * 65 + '.+.',
+                                            prefix + '+' * 40 + '.' +
+                                            '+' * 200 + '.',
+                                            prefix + '+' * 300 + '.',
+                                            '+.')]
+        evaluator = RacingEvaluator(max_iter=10_000, min_budget=50, eta=2)
+        results = evaluator._run(trainer, genes)
+        self.assertEqual([r[1] for r in results], [0, 199, 8581, 4420])
+        self.assertEqual(results[2][0], '')
+
+    def test_cache(self):
+        """Test genes dropped from the race are kept out of the cache"""
+        cache, Gene.cache = Gene.cache, FitnessCache()
+        try:
+            trainer = Match('', 'AB')
+            prefix = '+[-[.]]'
+            codes = [prefix + '+' * 65 + '.+.',
+                     prefix + '+' * 40 + '.' + '+' * 200 + '.',
+                     prefix + '+' * 300 + '.',
+                     '+.']
+            evaluator = RacingEvaluator(max_iter=10_000, min_budget=50,
+                                        eta=2)
+            evaluator.evaluate(trainer,
+                               [Gene(trainer, code) for code in codes])
+            self.assertIsNone(Gene.cache.get(trainer, codes[2]))
+            self.assertEqual(Gene(trainer, codes[2]).fitness(), 4591)
+            self.assertEqual(Gene.cache.get(trainer, codes[3])[1], 4420)
+            self.assertEqual(evaluator._dropped, set())
+        finally:
+            Gene.cache = cache
+
+    def test_invalid(self):
+        """Test budgets that never start or never grow are refused"""
+        with self.assertRaises(ValueError):
+            RacingEvaluator(min_budget=0)
+        with self.assertRaises(ValueError):
+            RacingEvaluator(eta=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import collections
+import random
+import unittest
+from unittest import TestCase
+
+from gp import selection
+
+
+class TestInverseWeights(TestCase):
+    """Test the function `selection.inverse_weights(fitnesses)`"""
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        self.assertEqual(selection.inverse_weights([]), [])
+
+    def test_inverse(self):
+        """Test weights are inversely proportional to fitness"""
+        self.assertEqual(selection.inverse_weights([1, 2, 4]), [1, .5, .25])
+
+    def test_zero(self):
+        """Test perfect fitnesses take all of the weight"""
+        self.assertEqual(selection.inverse_weights([3, 0, 0]), [0, 1, 1])
+
+    def test_infinite(self):
+        """Test infinite fitnesses get no weight, unless all are"""
+        inf = float('inf')
+        self.assertEqual(selection.inverse_weights([inf, 2]), [0, .5])
+        self.assertEqual(selection.inverse_weights([inf, inf]), [1, 1])
+
+
+class TestSelectors(TestCase):
+    """Test drawing from a generation with every kind of `Selector`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        random.seed(0)
+        self.population = ['a', 'b', 'c', 'd']
+        self.fitness = {'a': 1, 'b': 2, 'c': 4, 'd': 8}.__getitem__
+
+    def draw(self, selector, k=4000):
+        selector.build(reversed(self.population), self.fitness)
+        return collections.Counter(selector.sample(k))
+
+    def test_roulette(self):
+        counts = self.draw(selection.RouletteSelector())
+        self.assertAlmostEqual(counts['a'] / counts['b'], 2, delta=.2)
+        self.assertAlmostEqual(counts['b'] / counts['d'], 4, delta=1)
+
+    def test_rank(self):
+        counts = self.draw(selection.RankSelector(2))
+        self.assertEqual(counts['d'], 0)
+        self.assertGreater(counts['a'], counts['b'])
+        self.assertGreater(counts['b'], counts['c'])
+
+    def test_tournament(self):
+        counts = self.draw(selection.TournamentSelector(4))
+        self.assertGreater(counts['a'], counts['b'])
+        self.assertGreater(counts['b'], counts['d'])
+
+    def test_truncation(self):
+        counts = self.draw(selection.TruncationSelector(.5))
+        self.assertEqual(set(counts), {'a', 'b'})
+
+    def test_choice(self):
+        selector = selection.TruncationSelector(0)
+        selector.build(self.population, self.fitness)
+        self.assertEqual(selector.choice(), 'a')
+
+
+if __name__ == '__main__':
+    unittest.main()
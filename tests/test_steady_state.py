@@ -0,0 +1,61 @@
+import random
+import unittest
+from unittest import TestCase
+
+from gp.gene import Gene
+from gp.steady_state import Population, SteadyStateEvolve
+from gp.trainer import Match
+
+
+class TestPopulation(TestCase):
+    """Test the class `Population`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.trainer = Match('', '\x05')
+        self.genes = [Gene(self.trainer, '+' * n + '.') for n in (1, 4, 2)]
+        self.population = Population(self.genes)
+
+    def test_worst(self):
+        self.assertEqual(len(self.population), 3)
+        self.assertIs(self.population.worst, self.genes[0])
+        self.assertIs(self.population.best, self.genes[1])
+
+    def test_replace_worst(self):
+        """Test the worst gene is taken out, and the best kept track of"""
+        child = Gene(self.trainer, '+' * 5 + '.')
+        self.assertIs(self.population.replace_worst(child), self.genes[0])
+        self.assertIs(self.population.worst, self.genes[2])
+        self.assertIs(self.population.best, child)
+        self.assertCountEqual(self.population,
+                              [child, self.genes[1], self.genes[2]])
+
+    def test_fingerprints(self):
+        """Test the behaviours in the population are kept count of"""
+        self.population.replace_worst(Gene(self.trainer, '++.'))
+        self.assertEqual(self.population.fingerprints,
+                         {('\x02', 3): 2, ('\x04', 1): 1})
+        self.population.replace_worst(Gene(self.trainer, '+' * 5 + '.'))
+        self.population.replace_worst(Gene(self.trainer, '+' * 5 + '.'))
+        self.assertEqual(self.population.fingerprints,
+                         {('\x05', 0): 2, ('\x04', 1): 1})
+
+    def test_tournament(self):
+        """Test a tournament of everyone is won by the best gene"""
+        random.seed(0)
+        winners = {self.population.tournament(50) for _ in range(10)}
+        self.assertEqual(winners, {self.genes[1]})
+
+
+class TestSteadyStateEvolve(TestCase):
+    """Test the class `SteadyStateEvolve`"""
+
+    def test_solution(self):
+        random.seed(0)
+        trainer = Match('', '\x03')
+        code = SteadyStateEvolve(trainer, genes_per_gen=8).generate_solution()
+        self.assertEqual(Gene(trainer, code).fitness(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import threading
+import unittest
+from unittest import TestCase
+
+from gp.gene import Gene
+from gp.trainer import AddDigits, Hello, Match, Reverse, Suite
+
+
+class TestMatch(TestCase):
+    """Test the class `Match`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.trainer = Hello()
+        self.outputs = ['Hello world!', 'Jello world!', 'Hello', '',
+                        'Hello world!!!', '\x00' * 12, '\ud800\U0010ffff']
+
+    def test_check_fitness(self):
+        """Test differences count once, missing characters squared"""
+        self.assertEqual(self.trainer.check_fitness('Hello world!'), 0)
+        self.assertEqual(self.trainer.check_fitness('Jello world!'), 2)
+        self.assertEqual(self.trainer.check_fitness('Hello world'),
+                         ord('!') ** 2)
+        self.assertEqual(self.trainer.check_fitness(''),
+                         sum(ord(c) ** 2 for c in 'Hello world!'))
+
+    def test_check_fitness_batch(self):
+        """Test scoring a batch is the same as scoring each output"""
+        self.assertEqual(self.trainer.check_fitness_batch(self.outputs),
+                         [self.trainer.check_fitness(output)
+                          for output in self.outputs])
+        self.assertEqual(self.trainer.check_fitness_batch([]), [])
+        self.assertEqual(Match('', '').check_fitness_batch(['a', '']),
+                         [0, 0])
+
+
+class TestMatchScorer(TestCase):
+    """Test the class `MatchScorer`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.trainer = Hello()
+
+    def test_empty_case(self):
+        """Test the bound before any output"""
+        self.assertEqual(self.trainer.scorer().bound(), 0)
+
+    def test_bound(self):
+        """Test the bound never exceeds the final fitness"""
+        for output in ('Hello', 'Jello world!', 'a' * 20):
+            scorer = self.trainer.scorer()
+            for n, c in enumerate(output):
+                scorer.feed(c)
+                self.assertLessEqual(scorer.bound(),
+                                     self.trainer.check_fitness(output))
+                self.assertLessEqual(
+                    scorer.bound(),
+                    self.trainer.check_fitness(output[:n + 1] + 'llo world!'))
+
+    def test_complete(self):
+        """Test the bound is the fitness once all output is in"""
+        scorer = self.trainer.scorer()
+        scorer.feed('Jello world!!!')
+        self.assertEqual(scorer.bound(),
+                         self.trainer.check_fitness('Jello world!'))
+
+
+class TestSuite(TestCase):
+    """Test the class `Suite`"""
+
+    def test_cases(self):
+        """Test single case trainers are their own only case"""
+        trainer = Hello()
+        self.assertEqual(trainer.cases(), (trainer,))
+        self.assertEqual([c.gen_out() for c in Reverse(['ab']).cases()],
+                         ['ba'])
+        self.assertEqual(AddDigits().cases()[1].gen_in(), '34')
+        self.assertEqual(AddDigits().cases()[1].gen_out(), '7')
+
+    def test_stopped_at(self):
+        """Test cases that stop programs move to the front"""
+        a, b, c = Match('', 'a'), Match('', 'b'), Match('', 'c')
+        trainer = Suite([a, b, c])
+        trainer.stopped_at(c)
+        trainer.stopped_at(b)
+        trainer.stopped_at(c)
+        self.assertEqual(trainer.cases(), (c, b, a))
+
+    def test_stopped_at_threads(self):
+        """Test threads never see the cases while they are reordered"""
+        trainer = Reverse()
+        expected = Gene(Reverse(), '+.').run()
+        fitnesses = []
+        start = threading.Barrier(4)
+
+        def run():
+            start.wait()
+            for _ in range(5000):
+                fitnesses.append(Gene(trainer, '+.').run(100))
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(fitness in (None, expected)
+                            for fitness in fitnesses))
+
+
+if __name__ == '__main__':
+    unittest.main()
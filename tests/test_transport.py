@@ -0,0 +1,80 @@
+import sys
+import unittest
+from unittest import TestCase
+
+if sys.version_info < (3, 8):
+    raise unittest.SkipTest('multiprocessing.shared_memory is new in 3.8')
+
+from gp.gene import Gene  # noqa: E402
+from gp.trainer import Hello, Reverse  # noqa: E402
+from gp.transport import SharedMemoryEvaluator, pack, unpack  # noqa: E402
+
+
+class TestPack(TestCase):
+    """Test the functions `pack` and `unpack`"""
+
+    def test_round_trip(self):
+        """Test any slice of the programs can be read back"""
+        codes = ['', '+.', '++[>+++<-]>.', ',[.]', '']
+        block = pack(codes)
+        try:
+            self.assertEqual(unpack(block, len(codes), 0, len(codes)), codes)
+            self.assertEqual(unpack(block, len(codes), 1, 3), codes[1:3])
+            self.assertEqual(unpack(block, len(codes), 4, 5), [''])
+        finally:
+            block.close()
+            block.unlink()
+
+
+class TestSharedMemoryEvaluator(TestCase):
+    """Test the class `SharedMemoryEvaluator`"""
+
+    def setUp(self):
+        """Define useful variables for tests"""
+        self.cache, Gene.cache = Gene.cache, None
+        self.codes = ['', '+.', '++[>+++<-]>.', ',[.]', '+' * 72 + '.',
+                      '+[.+]', '+[]', '-' * 2 + '.']
+
+    def tearDown(self):
+        """Put back the cache"""
+        Gene.cache = self.cache
+
+    def check(self, trainer, evaluator, threshold=None):
+        """Test results are the same as running the genes in this process"""
+        expected = [Gene(trainer, code) for code in self.codes]
+        for g in expected:
+            g.fitness(threshold)
+        genes = [Gene(trainer, code) for code in self.codes]
+        try:
+            fitnesses = evaluator.evaluate(trainer, genes, threshold)
+        finally:
+            evaluator.close()
+        self.assertEqual(fitnesses, [g.fitness(threshold) for g in expected])
+        for g, e in zip(genes, expected):
+            self.assertEqual(g.evaluated, e.evaluated)
+            if e.evaluated:
+                self.assertEqual(g.output(), e.output())
+                self.assertEqual(g.cycles, e.cycles)
+
+    def test_evaluate(self):
+        self.check(Hello(), SharedMemoryEvaluator(2, chunks_per_worker=2))
+
+    def test_threshold(self):
+        """Test genes stopped early come back without output"""
+        self.check(Hello(), SharedMemoryEvaluator(2), threshold=1000)
+
+    def test_overflow(self):
+        """Test outputs too long for shared memory are sent back whole"""
+        self.check(Reverse(), SharedMemoryEvaluator(2, capacity=1))
+
+    def test_empty_case(self):
+        """Test the empty case"""
+        evaluator = SharedMemoryEvaluator(2)
+        try:
+            self.assertEqual(evaluator.evaluate(Hello(), []), [])
+        finally:
+            evaluator.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,5 +26,16 @@ class TestVisualizeControlChars(TestCase):
         self.assertEqual(utils.visualize_control_chars(''), '')
 
 
+class TestWeightedChoice(TestCase):
+    """
+    Test the function `utils.weighted_choice(object_list, key, inverse)`
+    """
+
+    def test_zero(self):
+        """Test a zero weight with `inverse`"""
+        self.assertEqual(utils.weighted_choice([3, 0, 2], lambda x: x, True),
+                         0)
+
+
 if __name__ == '__main__':
     unittest.main()